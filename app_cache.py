@@ -0,0 +1,86 @@
+import streamlit as st
+
+import perf
+from render import simple_text_block_html, week_html
+from roster import attendance_for_date
+from service import KEY_FILE, SCOPES, NameIndex, individual_month, open_team_rosters, team_summary
+from sheets import SheetConnection
+
+# Streamlit resources and caches of the app. They live here rather than in
+# streamlit_app.py so they are defined once per process: decorating a function
+# with st.cache_* on every rerun re-reads its source to build the cache key.
+
+# -------------------------------
+# Google Sheets Connection & Rosters
+# -------------------------------
+def make_credentials():
+    from google.oauth2.service_account import Credentials
+    try:
+        # Use st.secrets on Streamlit Cloud
+        return Credentials.from_service_account_info(st.secrets["google"], scopes=SCOPES)
+    except Exception:
+        return Credentials.from_service_account_file(KEY_FILE, scopes=SCOPES)
+
+
+@st.cache_resource
+def _shared_connection():
+    #return SheetConnection(make_credentials, "AppTester")
+    return SheetConnection(make_credentials, "MLP ONENOC DUTYCHART")
+
+
+def get_connection():
+    """Authorized client + worksheet handles, shared by all sessions of this process; counts the reuse."""
+    connection = _shared_connection()
+    connection.reused()
+    return connection
+
+
+@st.cache_resource
+def get_team_rosters(_connection, _teams, team_keys):
+    """One roster store per team, shared by all sessions, each kept fresh by its own refresher."""
+    return open_team_rosters(_connection, {key: _teams[key] for key in team_keys})
+
+
+@st.cache_resource(max_entries=16)
+def name_index(team_key, _code_to_name):
+    """`NameIndex` of a team's employees, shared by every session and both individual pickers."""
+    return NameIndex(_code_to_name)
+
+
+# -------------------------------
+# Rendered Views
+# -------------------------------
+@st.cache_data(max_entries=64)
+def day_block_html(title, target_date, team_key, data_version, _date_index):
+    """`simple_text_block_html` for one date, cached per (title, date, team, data fingerprint); None without data."""
+    perf.count("day_block_cache.miss")
+    data_df = attendance_for_date(_date_index, target_date)
+    if data_df is None or data_df.empty:
+        return None
+    return simple_text_block_html(title, data_df)
+
+
+@st.cache_data(max_entries=32)
+def render_week_html(monday, team_key, data_version, _date_index):
+    """All seven day tables of a week as one HTML block, cached per (week start, team, data fingerprint)."""
+    perf.count("week_html_cache.miss")
+    return week_html(_date_index, monday)
+
+
+@st.cache_resource(max_entries=256)
+def individual_report(code, year, month, team_key, data_version, _roster):
+    """`individual_month` table, cached per (employee, month, team, data fingerprint).
+
+    A resource rather than data: the table is only displayed, and unpickling a
+    cache_data copy costs as much as rebuilding it.
+    """
+    perf.count("individual_cache.miss")
+    return individual_month(_roster, code, year, month)
+
+
+@st.cache_resource(max_entries=8)
+def team_summary_table(team_key, data_version, _roster, _code_to_name):
+    """(`team_summary` frame, its CSV bytes) of all employees x months, cached per (team, data fingerprint)."""
+    perf.count("team_summary_cache.miss")
+    summary = team_summary(_roster, _code_to_name)
+    return summary, summary.to_csv(index=False).encode()
@@ -0,0 +1,633 @@
+"""Offline benchmarks for the attendance pipeline (no Streamlit server or Google credentials).
+
+    python benchmark.py                              # every stage at 1, 5 and 20 years of data
+    python benchmark.py --years 1 5 --employees 200
+    python benchmark.py --check --rows 3650          # optimized paths vs. the old per-cell code
+    python benchmark.py --rerun --rows 3650          # Streamlit rerun time for a radio click (AppTest)
+    python benchmark.py --ingest --rows 100000       # peak memory of paged vs. whole-sheet ingestion
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from roster import (
+    attendance_for_date, build_assignments, build_date_index, build_roster, extract_employee_code,
+    extract_employee_codes, group_assignments, individual_month_report, month_summary, parse_values,
+    resolve_attendance, shift_label, sorted_codes, SHIFT_LABELS,
+)
+from render import week_html
+from service import NameIndex
+from sheets import DeltaSync, FakeWorksheet, GuardedWorksheet, SheetsCaller
+
+# Same codes as the live app; kept here so the benchmark never imports Streamlit.
+SAMPLE_CODES = ["R", "K", "A", "P", "SHA", "B", "SH", "ST", "I", "JM", "JD", "RK", "RKM", "AMP", "N"]
+SAMPLE_CODE_TO_NAME = {code: f"Employee {code}" for code in SAMPLE_CODES}
+
+# Column groups of the real duty chart, in sheet order.
+SHIFT_GROUPS = [
+    ("Morning 8.00 to 15.30", 3), ("Evening 12.30 to 20.00", 3), ("Night 20.00 to 8.00", 2),
+    ("General", 4), ("W-Off", 4), ("Leave", 4), ("Duty Leave", 4),
+]
+
+CELL_SUFFIXES = ["", "", "", " (half day)", "/COFF", " W-OFF", " LEAVE", " GUEST", " (sick)"]
+
+
+def employee_codes(n):
+    """`n` distinct codes: the real ones first, then two- and three-letter codes."""
+    extra = ("".join(p) for k in (2, 3) for p in itertools.product(string.ascii_uppercase, repeat=k))
+    codes = list(SAMPLE_CODES)
+    for code in extra:
+        if len(codes) >= n:
+            break
+        if code not in codes:
+            codes.append(code)
+    return codes[:n]
+
+
+def random_cell(rng, codes):
+    """One raw duty-chart cell, in the messy forms people actually type."""
+    roll = rng.random()
+    if roll < 0.35:
+        return ""
+    if roll < 0.38:
+        return rng.choice(["GUEST", "-", "NA", "  "])
+    cell = rng.choice(codes) + rng.choice(CELL_SUFFIXES)
+    return cell.lower() if rng.random() < 0.05 else cell
+
+
+def raw_header(cols):
+    """Header row with `cols` shift columns: each group name followed by blank cells."""
+    header = []
+    while len(header) < cols:
+        for group, width in SHIFT_GROUPS:
+            header += [group] + [""] * (width - 1)
+    return ["Date", "Day"] + header[:cols]
+
+
+def synthetic_grid(rows, cols, codes=SAMPLE_CODES, seed=0, start=datetime.date(2020, 1, 1)):
+    """Raw sheet values (header + one row per day), as `get_all_values` returns them."""
+    rng = random.Random(seed)
+    values = [raw_header(cols)]
+    for i in range(rows):
+        d = start + datetime.timedelta(days=i)
+        values.append([d.strftime("%d/%m/%Y"), d.strftime("%A")] + [random_cell(rng, codes) for _ in range(cols)])
+    return values
+
+
+def synthetic_cells(rows, cols, codes=SAMPLE_CODES, seed=0):
+    return parse_values(synthetic_grid(rows, cols, codes, seed))
+
+
+def scalar_extract(df, code_list):
+    """The per-cell `.apply` loop the app used before the vectorized pass."""
+    out = df.copy()
+    for col in out.columns:
+        if col not in ["Date", "Day"]:
+            out[col] = out[col].apply(extract_employee_code, args=(code_list,))
+    return out
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_extraction(rows, cols):
+    code_list = sorted_codes(dict.fromkeys(SAMPLE_CODES))
+    df = synthetic_cells(rows, cols)
+
+    scalar_s, expected = timed(scalar_extract, df, code_list)
+    vector_s, actual = timed(extract_employee_codes, df, code_list)
+
+    mismatches = int((expected.fillna("<none>") != actual.astype(object).fillna("<none>")).to_numpy().sum())
+    if mismatches:
+        raise AssertionError(f"vectorized extraction differs from scalar in {mismatches} cells")
+
+    cells = rows * cols
+    object_mb = expected.memory_usage(deep=True).sum() / 2**20
+    compact_mb = actual.memory_usage(deep=True).sum() / 2**20
+    print(f"extract  {rows} rows x {cols} cols ({cells} cells)")
+    print(f"  scalar     {scalar_s * 1000:9.1f} ms  {cells / scalar_s:12.0f} cells/s")
+    print(f"  vectorized {vector_s * 1000:9.1f} ms  {cells / vector_s:12.0f} cells/s  ({scalar_s / vector_s:.1f}x)")
+    print(f"  memory     {object_mb:9.1f} MB as object strings, {compact_mb:.1f} MB as categoricals")
+    print("  parity     OK")
+
+
+def frames_equal(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return list(a.columns) == list(b.columns) and a.astype(str).equals(b.astype(str))
+
+
+def bench_date_index(rows, cols, sample=200):
+    code_list = sorted_codes(SAMPLE_CODE_TO_NAME)
+    df = extract_employee_codes(synthetic_cells(rows, cols), code_list)
+    dates = df["Date"].tolist()
+    sample_dates = dates[:: max(1, len(dates) // sample)]
+
+    build_s, index = timed(build_date_index, df, SAMPLE_CODE_TO_NAME, repeat=1)
+    week = dates[len(dates) // 2: len(dates) // 2 + 7]
+    scan_s, expected = timed(lambda: [resolve_attendance(df, d, SAMPLE_CODE_TO_NAME) for d in week])
+    lookup_s, actual = timed(lambda: [attendance_for_date(index, d) for d in week])
+
+    mismatches = [d for d in sample_dates if not frames_equal(
+        resolve_attendance(df, d, SAMPLE_CODE_TO_NAME), attendance_for_date(index, d))]
+    if mismatches:
+        raise AssertionError(f"date index differs from resolve_attendance on {mismatches[:5]}")
+
+    print(f"date index  {rows} rows")
+    print(f"  build          {build_s * 1000:9.1f} ms  (once per load)")
+    print(f"  week by scan   {scan_s * 1000:9.1f} ms")
+    print(f"  week by index  {lookup_s * 1000:9.1f} ms  ({scan_s / lookup_s:.1f}x)")
+    print(f"  parity     OK  ({len(sample_dates)} dates)")
+
+
+def scan_individual_month(df, code, year, month):
+    """The row-by-row month scan `show_individual_report` used to do per person."""
+    df_month = df[(df["Date"].apply(lambda d: d.month) == month) & (df["Date"].apply(lambda d: d.year) == year)]
+    found = {}
+    for _, row in df_month.iterrows():
+        shifts = [shift_label(col) for col in df.columns
+                  if col != "Date" and str(row[col]).strip().upper() == code.upper()]
+        if shifts:
+            found[row["Date"]] = shifts
+    return found
+
+
+def bench_individual(rows, cols):
+    code_list = sorted_codes(SAMPLE_CODE_TO_NAME)
+    df = extract_employee_codes(synthetic_cells(rows, cols), code_list)
+    months = sorted({(d.year, d.month) for d in df["Date"]})
+
+    build_s, by_month = timed(lambda: group_assignments(df, build_assignments(df, SAMPLE_CODE_TO_NAME)), repeat=1)
+    year, month = months[len(months) // 2]
+    scan_s, _ = timed(lambda: [scan_individual_month(df, c, year, month) for c in SAMPLE_CODES])
+    lookup_s, _ = timed(lambda: [by_month[(year, month)].get(c, {}) for c in SAMPLE_CODES])
+
+    for y, m in months[:: max(1, len(months) // 12)]:
+        for code in SAMPLE_CODES:
+            if scan_individual_month(df, code, y, m) != by_month[(y, m)].get(code, {}):
+                raise AssertionError(f"assignment index differs from the month scan for {code} {y}-{m:02d}")
+
+    print(f"individual  {len(months)} months, {len(SAMPLE_CODES)} employees")
+    print(f"  build          {build_s * 1000:9.1f} ms  (once per load)")
+    print(f"  month by scan  {scan_s * 1000:9.1f} ms  (all employees)")
+    print(f"  month lookup   {lookup_s * 1000:9.3f} ms  (all employees)")
+    print("  parity     OK")
+
+
+def summary_from_reports(by_month, code, year, month):
+    """One `month_summary` row worked out from an employee's individual report, the old per-person way."""
+    kinds = {label: kind for kind, label in SHIFT_LABELS}
+    report = individual_month_report(by_month[(year, month)], code, datetime.date(year, month, 1))
+    counts = dict.fromkeys(kinds.values(), 0)
+    run = longest = unrecorded = 0
+    for status in report["Shift/Status"]:
+        labels = [] if status == "❓ UNRECORDED" else status.split(" / ")
+        unrecorded += not labels
+        for label in labels:
+            if label in kinds:
+                counts[kinds[label]] += 1
+        run = run + 1 if "Night 20.00 to 8.00" in labels else 0
+        longest = max(longest, run)
+    return [*counts.values(), longest, unrecorded]
+
+
+def bench_summary(rows, cols):
+    code_list = sorted_codes(SAMPLE_CODE_TO_NAME)
+    df = extract_employee_codes(synthetic_cells(rows, cols), code_list)
+    by_month = group_assignments(df, build_assignments(df, SAMPLE_CODE_TO_NAME))
+
+    bulk_s, summary = timed(month_summary, df, SAMPLE_CODE_TO_NAME)
+    per_person_s, _ = timed(lambda: [
+        summary_from_reports(by_month, code, y, m) for y, m in by_month for code in SAMPLE_CODES], repeat=1)
+
+    values = summary.set_index(["Month", "Code"]).drop(columns="Name")
+    for y, m in list(by_month)[:: max(1, len(by_month) // 12)]:
+        for code in SAMPLE_CODES:
+            if values.loc[(f"{y}-{m:02d}", code)].tolist() != summary_from_reports(by_month, code, y, m):
+                raise AssertionError(f"month summary differs from the individual report for {code} {y}-{m:02d}")
+
+    print(f"summary     {len(by_month)} months, {len(SAMPLE_CODES)} employees")
+    print(f"  bulk           {bulk_s * 1000:9.1f} ms  (all employees x months)")
+    print(f"  per person     {per_person_s * 1000:9.1f} ms  (one individual report each)")
+    print("  parity     OK")
+
+
+def synthetic_names(n, seed=3):
+    """{code: display name} of `n` employees with made-up names and the chart's JTO/SDE suffixes."""
+    rng = random.Random(seed)
+    syllables = ["ra", "ja", "sh", "ee", "na", "mi", "al", "ku", "th", "ya", "an", "vi", "de", "pr", "su"]
+    word = lambda: "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize()
+    return {code: f"{word()} {word()} {rng.choice(['JTO', 'SDE'])}" for code in employee_codes(n)}
+
+
+def bench_search(employees=5000):
+    code_to_name = synthetic_names(employees)
+    build_s, index = timed(NameIndex, code_to_name, repeat=1)
+    names = sorted(code_to_name.values())
+    rng = random.Random(4)
+    queries = [name[:k] for name in rng.sample(names, 50) for k in (1, 3, 6)]
+    queries += [name.split()[1][1:4] for name in rng.sample(names, 50)] + ["RKM", "jto", "sde"]
+
+    scan_s, _ = timed(lambda: [[n for n in names if q.upper() in n.upper()] for q in queries])
+    search_s, _ = timed(lambda: [index.search(q) for q in queries])
+    for q in queries:
+        found = set(index.search(q))
+        if any(n not in found for n in names if q.upper() in n.upper()):
+            raise AssertionError(f"name search misses a substring match for {q!r}")
+    if index.search("RKM")[0] != code_to_name["RKM"]:
+        raise AssertionError("an exact code does not rank first")
+
+    print(f"search      {employees} employees, {len(queries)} queries")
+    print(f"  build          {build_s * 1000:9.1f} ms  (once per team)")
+    print(f"  substring scan {scan_s / len(queries) * 1000:9.3f} ms  per query")
+    print(f"  index search   {search_s / len(queries) * 1000:9.3f} ms  per query")
+    print("  parity     OK")
+
+
+def bench_delta_sync(rows, cols):
+    code_list = sorted_codes(SAMPLE_CODE_TO_NAME)
+    parse = lambda values: extract_employee_codes(parse_values(values), code_list)
+    ws = FakeWorksheet(synthetic_grid(rows, cols))
+    today = datetime.date(2020, 1, 1) + datetime.timedelta(days=rows - 30)
+    sync = DeltaSync(ws, parse)
+
+    full_s, _ = timed(sync.refresh, today, repeat=1)
+    unchanged_s, _ = timed(sync.refresh, today, repeat=1)
+
+    # someone swaps a few names near today and adds the next days to the chart
+    rng = random.Random(1)
+    for offset in (-2, 0, 5):
+        ws.update_cell(rows - 30 + offset + 2, 4, rng.choice(SAMPLE_CODES))
+    for i in range(3):
+        d = datetime.date(2020, 1, 1) + datetime.timedelta(days=rows + i)
+        ws.append_row([d.strftime("%d/%m/%Y"), d.strftime("%A")] + [random_cell(rng, SAMPLE_CODES) for _ in range(cols)])
+    fetched_before = sync.stats["rows_fetched"]
+    delta_s, synced = timed(sync.refresh, today, repeat=1)
+
+    expected = parse(ws.get_all_values())
+    if not frames_equal(expected, synced):
+        raise AssertionError("delta sync result differs from a full re-read")
+
+    print(f"delta sync  {rows} rows")
+    print(f"  full read      {full_s * 1000:9.1f} ms  ({rows + 1} rows)")
+    print(f"  unchanged      {unchanged_s * 1000:9.1f} ms  (modified-time check only)")
+    print(f"  edited         {delta_s * 1000:9.1f} ms  ({sync.stats['rows_fetched'] - fetched_before} rows)")
+
+    # paged full reads, over a sheet with a blank stretch, trailing blank rows and a stray wide cell
+    for i in range(rows // 3, rows // 3 + 150):
+        ws.values[i] = [""] * len(ws.values[i])
+    ws.values[rows // 2].extend(["", "", "NOTE"])
+    ws.values.extend([[""] * 5 for _ in range(40)])
+    paged = DeltaSync(ws, parse, page_rows=128, check_modified=False, full_every=1)
+    whole_reads = ws.calls["get_all_values"]
+    paged_s, synced = timed(paged.refresh, today, repeat=1)
+    if not frames_equal(parse(ws.get_all_values()), synced):
+        raise AssertionError("paged read differs from a single full read")
+    # a full read of an unchanged sheet parses nothing; an edit re-parses just that row
+    parsed = paged.stats["rows_parsed"]
+    if paged.refresh(today) is not synced or paged.stats["rows_parsed"] != parsed:
+        raise AssertionError("full read of an unchanged sheet re-parsed rows")
+    ws.update_cell(rows // 4, 4, "" if ws.values[rows // 4 - 1][3] else SAMPLE_CODES[0])
+    if not frames_equal(parse(ws.get_all_values()), paged.refresh(today)) or paged.stats["rows_parsed"] != parsed + 1:
+        raise AssertionError("full read after a one-cell edit differs or re-parsed more than that row")
+    # the chart grows past the grid it had when opened, and then fills the grid to its last row
+    extra = synthetic_grid(rows + 300, cols)[rows + 1:]
+    ws.values.extend(extra)
+    if not frames_equal(parse(ws.get_all_values()), paged.refresh(today)):
+        raise AssertionError("paged read of a sheet grown past its opening grid differs from a single full read")
+    ws.values[-1] = list(ws.values[rows // 2 - 1])
+    if not frames_equal(parse(ws.get_all_values()), paged.refresh(today)):
+        raise AssertionError("paged read of a full grid differs from a single full read")
+    if ws.calls["get_all_values"] != whole_reads + 4:  # just the four comparison reads above
+        raise AssertionError("paged reads fell back to reading the whole sheet")
+    print(f"  paged read     {paged_s * 1000:9.1f} ms  (128-row pages)")
+    print("  parity     OK")
+
+
+class JsonWorksheet(FakeWorksheet):
+    """FakeWorksheet whose reads go through JSON, so every cell is a fresh string as from the API."""
+
+    def get_all_values(self):
+        return json.loads(json.dumps(super().get_all_values()))
+
+    def batch_get(self, ranges):
+        return json.loads(json.dumps(super().batch_get(ranges)))
+
+
+def bench_ingest(rows, cols, page_rows=5000):
+    """Peak memory of reading and parsing a long sheet in one piece vs. in pages."""
+    code_list = sorted_codes(SAMPLE_CODE_TO_NAME)
+    parse = lambda values: extract_employee_codes(parse_values(values), code_list)
+    start = datetime.date(2026, 1, 1) - datetime.timedelta(days=rows)
+    ws = JsonWorksheet(synthetic_grid(rows, cols, start=start) + [[]] * 500)  # spare grid rows, as in a real sheet
+
+    results = {}
+    print(f"ingest      {rows} rows x {cols} shift columns")
+    for name, pages in (("whole sheet", None), (f"{page_rows}-row pages", page_rows)):
+        sync = DeltaSync(ws, parse, page_rows=pages, check_modified=False)
+        tracemalloc.start()
+        try:
+            started = time.perf_counter()
+            frame = sync.refresh()
+            seconds = time.perf_counter() - started
+            kept, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        results[name] = frame
+        print(f"  {name:<15}{seconds * 1000:>9.0f} ms  peak {peak / 2**20:7.1f} MB  kept {kept / 2**20:6.1f} MB")
+    frame = results["whole sheet"]
+    print(f"  parsed frame   {frame.memory_usage(deep=True).sum() / 2**20:9.1f} MB")
+    if not frames_equal(*results.values()):
+        raise AssertionError("paged ingestion differs from the whole-sheet read")
+    print("  parity     OK")
+
+
+def bench_fetch():
+    """SheetsCaller against a fake worksheet with injected latency and HTTP errors."""
+    grid = synthetic_grid(200, 8)
+    sleeps = []
+    fast_retries = lambda **kw: SheetsCaller(base_delay=0.01, max_delay=0.05, sleep=lambda s: sleeps.append(s) or time.sleep(s), **kw)
+
+    # 20 sessions miss at once: one request
+    ws = FakeWorksheet(grid, latency=0.05)
+    guarded = GuardedWorksheet(ws, SheetsCaller())
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda _: guarded.get_all_values(), range(20)))
+        coalesced_s = time.perf_counter() - started
+    if ws.calls["get_all_values"] != 1 or any(r != results[0] for r in results):
+        raise AssertionError(f"20 concurrent reads made {ws.calls['get_all_values']} requests")
+
+    # quota and server errors are retried, with jittered, growing waits
+    ws = FakeWorksheet(grid, errors=[429, 503, 500])
+    caller = fast_retries()
+    if GuardedWorksheet(ws, caller).get_all_values() != ws.get_all_values() or caller.stats["retries"] != 3:
+        raise AssertionError("transient errors were not retried")
+    if not all(0 <= s <= 0.01 * 2 ** i for i, s in enumerate(sleeps)):
+        raise AssertionError(f"backoff waits out of range: {sleeps}")
+    retry_waits = ", ".join(f"{s * 1000:.1f}" for s in sleeps)
+
+    # other errors are not, and a call stops at its time budget
+    ws = FakeWorksheet(grid, errors=[404])
+    try:
+        GuardedWorksheet(ws, fast_retries()).get_all_values()
+        raise AssertionError("a 404 did not raise")
+    except Exception as exc:
+        if ws.calls["get_all_values"] != 1 or getattr(exc, "response", None) is None:
+            raise
+    ws = FakeWorksheet(grid, latency=0.02, errors=[503] * 1000)
+    caller = fast_retries(max_attempts=1000, budget=0.3)
+    started = time.perf_counter()
+    try:
+        GuardedWorksheet(ws, caller).get_all_values()
+        raise AssertionError("endless 503s did not raise")
+    except Exception as exc:
+        budget_s = time.perf_counter() - started
+        if (getattr(exc, "response", None) is None and not isinstance(exc, TimeoutError)) or budget_s > 0.5:
+            raise
+
+    # the token bucket spaces requests out once the burst is spent
+    ws = FakeWorksheet(grid)
+    guarded = GuardedWorksheet(ws, SheetsCaller(rate=50, burst=5))
+    started = time.perf_counter()
+    for i in range(15):
+        guarded.batch_get([f"{i + 1}:{i + 1}"])
+    limited_s = time.perf_counter() - started
+    if limited_s < 10 / 50 * 0.9:
+        raise AssertionError(f"15 requests at 50/s with a burst of 5 took only {limited_s:.3f}s")
+
+    print("fetch       fake worksheet, injected latency and errors")
+    print(f"  coalesced      {coalesced_s * 1000:9.1f} ms  (20 concurrent reads, 1 request of 50 ms)")
+    print(f"  retried        429, 503, 500 then success, after waits of {retry_waits} ms")
+    print(f"  budget         {budget_s * 1000:9.1f} ms  (endless 503s, 300 ms budget)")
+    print(f"  rate limited   {limited_s * 1000:9.1f} ms  (15 requests, 50/s, burst 5)")
+    print("  parity     OK")
+
+
+def bench_roster_update(rows, cols):
+    code_list = sorted_codes(SAMPLE_CODE_TO_NAME)
+    df = extract_employee_codes(synthetic_cells(rows, cols), code_list)
+
+    def full_build(frame):
+        roster = build_roster(frame, SAMPLE_CODE_TO_NAME)
+        roster.date_index.load()
+        roster.assignments_by_month.load()
+        return roster
+
+    full_s, base = timed(full_build, df, repeat=1)
+    unchanged_s, same = timed(build_roster, df.copy(), SAMPLE_CODE_TO_NAME, base, repeat=1)
+    if same is not base:
+        raise AssertionError("an unchanged frame rebuilt the roster")
+
+    # a few names swapped, including on a night shift, and the last day removed
+    rng = random.Random(2)
+    edited = df.copy()
+    night = [i for i, c in enumerate(df.columns) if c.startswith("Night")]
+    for r, c in ((rows // 2, 3), (rows - 20, night[0]), (rows - 19, night[-1])):
+        edited.iat[r, c] = rng.choice(SAMPLE_CODES)
+    edited = edited.iloc[:-1]
+    def update(frame):
+        roster = build_roster(frame, SAMPLE_CODE_TO_NAME, base)
+        roster.date_index.load()
+        roster.assignments_by_month.load()
+        return roster
+
+    update_s, updated = timed(update, edited, repeat=1)
+
+    expected = build_roster(edited, SAMPLE_CODE_TO_NAME)
+    if updated.version != expected.version or updated.date_index.keys() != expected.date_index.keys():
+        raise AssertionError("incremental roster differs from a full rebuild")
+    mismatches = [d for d in expected.date_index if updated.date_index[d] != expected.date_index[d] and not frames_equal(
+        attendance_for_date(updated.date_index, d), attendance_for_date(expected.date_index, d))]
+    if mismatches or updated.assignments_by_month != expected.assignments_by_month:
+        raise AssertionError(f"incremental roster differs from a full rebuild on {mismatches[:5]}")
+
+    print(f"roster      {rows} rows")
+    print(f"  full build     {full_s * 1000:9.1f} ms  (every month resolved)")
+    print(f"  unchanged      {unchanged_s * 1000:9.1f} ms  (fingerprint only)")
+    print(f"  edited         {update_s * 1000:9.1f} ms  (4 dates edited, every month resolved)")
+    print("  parity     OK")
+
+
+# -------------------------------
+# Stage Suite
+# -------------------------------
+def measure(fn, repeat):
+    """(best wall time in s, peak traced memory in bytes, result) of `fn()`."""
+    seconds, result = timed(fn, repeat=repeat)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def run_suite(years, employees, cols, repeat):
+    codes = employee_codes(employees)
+    code_to_name = {code: f"Employee {code}" for code in codes}
+    code_list = sorted_codes(code_to_name)
+    rows = int(years * 365.25)
+    start = datetime.date(2026, 1, 1) - datetime.timedelta(days=rows)
+    ws = FakeWorksheet(synthetic_grid(rows, cols, codes, start=start))
+
+    print(f"\n{years:g} years: {rows} rows x {cols} shift columns, {employees} employees")
+    print(f"  {'stage':<24}{'time ms':>10}{'throughput':>24}{'peak MB':>10}")
+
+    def stage(name, fn, work, unit):
+        seconds, peak, result = measure(fn, repeat)
+        print(f"  {name:<24}{seconds * 1000:>10.1f}{work / seconds:>14,.0f} {unit:<10}{peak / 2**20:>9.1f}")
+        return result
+
+    parsed = stage("load_sheet", lambda: parse_values(ws.get_all_values()), rows, "rows/s")
+    df = stage("extract_employee_codes", lambda: extract_employee_codes(parsed, code_list), rows * cols, "cells/s")
+
+    date_index = stage("build_date_index", lambda: build_date_index(df, code_to_name), rows, "rows/s")
+    dates = df["Date"].tolist()[-365:]
+    stage("attendance_for_date", lambda: [attendance_for_date(date_index, d) for d in dates], len(dates), "lookups/s")
+
+    by_month = stage("build_assignments", lambda: group_assignments(df, build_assignments(df, code_to_name)),
+                     rows, "rows/s")
+    months = [datetime.date(y, m, 1) for y, m in sorted({(d.year, d.month) for d in dates})[-3:]]
+    stage("individual_month_report",
+          lambda: [individual_month_report(by_month[(m.year, m.month)], code, m) for m in months for code in codes],
+          len(months) * len(codes), "reports/s")
+
+    stage("month_summary", lambda: month_summary(df, code_to_name), rows, "rows/s")
+
+    last = dates[-1]
+    mondays = [last - datetime.timedelta(days=last.weekday() + 7 * w) for w in range(1, 9)]
+    stage("week_html", lambda: [week_html(date_index, monday) for monday in mondays], len(mondays), "weeks/s")
+
+    # the landing page on a fresh roster: months are resolved lazily, so only
+    # today's and tomorrow's month cost anything, however long the history is
+    def landing():
+        roster = build_roster(df, code_to_name)
+        return [attendance_for_date(roster.date_index, d) for d in (dates[-2], dates[-1])]
+    stage("build_roster + landing", landing, rows, "rows/s")
+
+
+# -------------------------------
+# Streamlit Reruns
+# -------------------------------
+def fake_sheets(rows, cols):
+    """Point gspread at an in-memory synthetic chart ending ~2 months from today, without credentials."""
+    import gspread
+    from google.oauth2 import service_account
+
+    import service
+    if getattr(gspread.authorize, "fake", False):
+        return
+    start = datetime.date.today() - datetime.timedelta(days=rows - 60)
+    ws = FakeWorksheet(synthetic_grid(rows, cols, start=start))
+
+    class Spreadsheet:
+        def get_worksheet(self, index): return ws
+        def worksheet(self, title): return ws
+
+    class Client:
+        def open(self, name): return Spreadsheet()
+        def set_timeout(self, timeout): pass
+
+    authorize = lambda credentials: Client()
+    authorize.fake = True
+    gspread.authorize = authorize
+    service_account.Credentials.from_service_account_info = classmethod(lambda cls, info, **kwargs: object())
+    service.SNAPSHOT_DIR = tempfile.mkdtemp(prefix="roster-bench-")
+
+
+RERUN_SCRIPT = """\
+import sys
+sys.path.insert(0, {root!r})
+import benchmark
+benchmark.fake_sheets({rows}, {cols})
+exec(compile(open({app!r}).read(), {app!r}, "exec"), {{"__name__": "__main__", "__file__": {app!r}}})
+"""
+
+
+def bench_rerun(rows, cols, clicks=20):
+    """Wall time of the app's first run and of reruns after clicking a name in the individual radio."""
+    import gspread  # noqa: F401 -- patched by fake_sheets; keep its import out of the first run's time
+    from streamlit.testing.v1 import AppTest
+
+    import perf
+    root = os.path.dirname(os.path.abspath(__file__))
+    app = os.path.join(root, "streamlit_app.py")
+    at = AppTest.from_string(RERUN_SCRIPT.format(root=root, app=app, rows=rows, cols=cols), default_timeout=120)
+    at.secrets["google"] = {}
+    first_s, _ = timed(at.run, repeat=1)
+    if at.exception:
+        raise AssertionError(at.exception[0].message)
+
+    names = at.radio[0].options[1:3]
+    perf.reset()
+    samples = []
+    for i in range(clicks):
+        start = time.perf_counter()
+        at.radio[0].set_value(names[i % 2]).run()
+        samples.append(time.perf_counter() - start)
+    script = {row["stage"]: row for row in perf.summary()}["rerun"]
+    samples.sort()
+
+    print(f"rerun       {rows} rows, {clicks} radio clicks")
+    print(f"  first run      {first_s * 1000:9.1f} ms  (sheet load + index build)")
+    print(f"  click p50      {samples[len(samples) // 2] * 1000:9.1f} ms  (AppTest wall time)")
+    print(f"  script p50     {script['p50_ms']:9.1f} ms  p95 {script['p95_ms']:.1f} ms  (perf 'rerun' stage)")
+
+
+# -------------------------------
+# Parity Checks
+# -------------------------------
+def run_checks(rows, cols):
+    bench_extraction(rows, cols)
+    bench_date_index(rows, cols)
+    bench_individual(rows, cols)
+    bench_summary(rows, cols)
+    bench_search()
+    bench_delta_sync(rows, cols)
+    bench_fetch()
+    bench_roster_update(rows, cols)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the attendance pipeline offline.")
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 5, 20], help="years of duty chart per run")
+    parser.add_argument("--employees", type=int, default=120, help="distinct employee codes")
+    parser.add_argument("--cols", type=int, default=24, help="shift columns per row")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per stage (best is reported)")
+    parser.add_argument("--check", action="store_true", help="run the parity checks instead of the suite")
+    parser.add_argument("--rerun", action="store_true", help="time app reruns with Streamlit's AppTest instead")
+    parser.add_argument("--ingest", action="store_true", help="peak memory of paged vs. whole-sheet ingestion instead")
+    parser.add_argument("--rows", type=int, default=3650, help="sheet rows (days) for --check, --rerun and --ingest")
+    args = parser.parse_args()
+    if args.rerun:
+        bench_rerun(args.rows, args.cols)
+        return
+    if args.ingest:
+        bench_ingest(args.rows, args.cols)
+        return
+    if args.check:
+        run_checks(args.rows, args.cols)
+        return
+    for years in args.years:
+        run_suite(years, args.employees, args.cols, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import collections
+import contextlib
+import functools
+import json
+import threading
+import time
+
+# Rolling window of samples kept per stage.
+WINDOW = 500
+
+_samples = collections.defaultdict(lambda: collections.deque(maxlen=WINDOW))
+_counters = collections.Counter()
+_lock = threading.Lock()
+
+
+# -------------------------------
+# Recording
+# -------------------------------
+def record(stage, seconds):
+    with _lock:
+        _samples[stage].append((time.time(), seconds))
+
+
+def count(name, n=1):
+    """Bump a counter, e.g. API calls or cache hits/misses."""
+    with _lock:
+        _counters[name] += n
+
+
+@contextlib.contextmanager
+def timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    """Decorator form of `timer`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# -------------------------------
+# Reporting
+# -------------------------------
+def _percentile(sorted_values, q):
+    if not sorted_values: return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summary():
+    """[{stage, n, p50_ms, p95_ms, last_ms}] over each stage's rolling window."""
+    with _lock:
+        samples = {stage: list(values) for stage, values in _samples.items()}
+    rows = []
+    for stage in sorted(samples):
+        durations = sorted(s for _, s in samples[stage])
+        rows.append({
+            "stage": stage,
+            "n": len(durations),
+            "p50_ms": round(_percentile(durations, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(durations, 0.95) * 1000, 2),
+            "last_ms": round(samples[stage][-1][1] * 1000, 2),
+        })
+    return rows
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def to_jsonl():
+    """Every sample in the rolling windows plus the counters, one JSON object per line."""
+    with _lock:
+        lines = [
+            json.dumps({"type": "sample", "stage": stage, "ts": ts, "ms": round(seconds * 1000, 3)})
+            for stage, values in _samples.items() for ts, seconds in values
+        ]
+        lines += [json.dumps({"type": "counter", "name": name, "value": value}) for name, value in _counters.items()]
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _counters.clear()
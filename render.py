@@ -0,0 +1,76 @@
+import html as _html  # stdlib html.escape
+
+import perf
+from roster import column_info, week_attendance
+
+# -------------------------------
+# Today/Tomorrow Cards
+# -------------------------------
+@perf.timed("cards_html")
+def simple_text_block_html(title, data_df):
+    """Title, date and one colored card per shift column, as a single markdown/HTML fragment."""
+    row = data_df.iloc[0]
+    date_str = row["Date"]
+
+    parts = [f"### {title}\n\n**{date_str}**\n\n", "<div style='margin-top: 6px;'>"]
+
+    for col in data_df.columns:
+        if col == "Date":
+            continue
+
+        raw_val = row[col]
+        # convert to str safely and strip
+        value = "" if raw_val is None else str(raw_val).strip()
+        if not value or value.lower() == "nan":
+            continue
+
+        # escape value so any angle-brackets in data won't break HTML
+        safe_value = _html.escape(value)
+
+        # single clean HTML block per item (use span for label)
+        parts.append(
+            f"<div style='"
+            f"background: {column_info(col).color};"
+            f"color: black;"
+            f"padding: 8px 10px;"
+            f"border-radius: 6px;"
+            f"margin: 6px 0;"
+            f"font-size: 14px;"
+            f"max-width: 90%;"
+            f"word-wrap: break-word;"
+            f"'>"
+            f"<span style='font-weight:600'>{_html.escape(col)}:</span>&nbsp;{safe_value}"
+            f"</div>"
+        )
+
+    parts.append("</div>\n\n<hr style='margin: 10px 0;'>")
+    return "".join(parts)
+
+
+# -------------------------------
+# Weekly Tables
+# -------------------------------
+@perf.timed("week_html")
+def week_html(date_index, monday):
+    """All seven day tables of the week starting at `monday`, as one HTML block."""
+    all_days_html = []
+    for day, result in week_attendance(date_index, monday):
+        
+        day_heading_html = f"""<div style='text-align:right; font-size:13px; color:#777; margin:2px 0 2px 0; padding-right: 5px;'>{day.strftime('%A, %d %b %Y')}</div>"""
+        all_days_html.append(day_heading_html)
+        
+        if result is None:
+            no_data_html = f"""<div style='padding: 5px; background-color: #f0f2f6; color: #888; border-radius: 3px; text-align: center;'>No attendance found.</div><hr style='border: none; border-top: 1px solid #eee; margin: 5px 0;'>"""
+            all_days_html.append(no_data_html)
+            continue
+
+        result = result.drop(columns=[c for c in result.columns if c == "Date" or column_info(c).hidden])
+        result = result.replace("</div>", "", regex=False)
+        styled = result.style.hide(axis="index")
+        html_table = styled.to_html(escape=False).strip() 
+        all_days_html.append(html_table)
+        separator_html = "<hr style='margin: 25px 0;'>"
+        all_days_html.append(separator_html)
+
+    final_weekly_html = "<div style='overflow-x:auto; white-space: nowrap;'>" + "".join(all_days_html) + "</div>"
+    return final_weekly_html
@@ -0,0 +1,653 @@
+import collections
+import collections.abc
+import datetime
+import functools
+import hashlib
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+import perf
+
+# -------------------------------
+# Sheet Parsing
+# -------------------------------
+def make_unique(headers):
+    counts = {}
+    new_headers = []
+    for h in headers:
+        if h not in counts:
+            counts[h] = 1
+            new_headers.append(h)
+        else:
+            counts[h] += 1
+            new_headers.append(f"{h}_{counts[h]}")
+    return new_headers
+
+
+def fix_header(raw_header):
+    """Blank header cells take the name of the group to their left, then get de-duplicated."""
+    return list(_fix_header(tuple(raw_header)))
+
+
+@functools.lru_cache(maxsize=16)
+def _fix_header(raw_header):
+    # worked out once per header version, however many pages of rows are parsed with it
+    header = [h if h.strip() != "" else f"col_{i}" for i, h in enumerate(raw_header)]
+    fixed_header = []
+    last_header = None
+    for h in header:
+        if not h.startswith("col_"):
+            last_header = h
+            fixed_header.append(h)
+        else:
+            fixed_header.append(last_header)
+    return tuple(make_unique(fixed_header))
+
+
+@perf.timed("parse_values")
+def parse_values(values):
+    """Sheet grid (header row + data rows, as `get_all_values` returns it) -> DataFrame."""
+    df = pd.DataFrame(values[1:], columns=fix_header(values[0]))
+
+    if "Date" in df.columns:
+        # object dtype even when no cell parses, so grids parsed in pieces concatenate alike
+        df["Date"] = pd.to_datetime(df["Date"], format="%d/%m/%Y", errors="coerce").dt.date.astype(object)
+
+    return df
+
+
+# -------------------------------
+# Employee Code Extraction
+# -------------------------------
+# Cell cleanup: drop "(...)" remarks, anything after "/", and trailing status words.
+CLEANUP_RE = re.compile(r'(\s*\([^)]*\))|(\/.*)|(\s+W-OFF|\s+LEAVE|\s+COFF|\s+GUEST)', re.IGNORECASE)
+
+NON_CODE_COLUMNS = ("Date", "Day")
+
+
+def sorted_codes(code_to_name):
+    """Known codes, longest first, so "RKM" wins over "RK" and "R"."""
+    return sorted(code_to_name.keys(), key=lambda x: -len(x))
+
+
+def code_dtype(code_list):
+    """Categorical dtype of the extracted code columns: one small int per cell instead of a string."""
+    return pd.CategoricalDtype(sorted(code_list))
+
+
+def extract_employee_code(raw_value, code_list):
+    """Scalar reference: map one raw sheet cell to an employee code (or None)."""
+    if pd.isna(raw_value) or not raw_value: return None
+    raw_value = str(raw_value).upper().strip()
+    cleaned = CLEANUP_RE.sub('', raw_value).strip()
+    if not cleaned: return None
+    for code in code_list:
+        if code in cleaned:
+            return code
+    return None
+
+
+def _resolve_unique_cells(uniques, code_list):
+    """Resolve an array of distinct raw cell values to codes in one vectorized pass."""
+    cleaned = (
+        pd.Series(uniques, dtype=object).astype(str).str.upper().str.strip()
+        .str.replace(CLEANUP_RE, '', regex=True).str.strip()
+    )
+    resolved = np.full(len(cleaned), None, dtype=object)
+    pending = (cleaned != "").to_numpy()
+    for code in code_list:
+        if not pending.any():
+            break
+        hit = pending & cleaned.str.contains(code, regex=False).to_numpy()
+        resolved[hit] = code
+        pending &= ~hit
+    return resolved
+
+
+@perf.timed("extract_employee_codes")
+def extract_employee_codes(df, code_list, skip=NON_CODE_COLUMNS):
+    """Vectorized `extract_employee_code` over every non-Date/Day column of `df`.
+
+    The sheet only holds a few hundred distinct cell strings, so the cells are
+    factorized once and only the unique values go through the regex/match step.
+    Code columns come back as `code_dtype(code_list)` categoricals, missing
+    codes as NaN.
+    """
+    dtype = code_dtype(code_list)
+    positions = [i for i, c in enumerate(df.columns) if c not in skip]
+    if not positions or df.empty:
+        out = df.copy()
+        for pos in positions:
+            out.isetitem(pos, df.iloc[:, pos].apply(extract_employee_code, args=(code_list,)).astype(dtype))
+        return out
+
+    block = df.iloc[:, positions].to_numpy(dtype=object)
+    flat = block.ravel()
+    # "" and missing cells never carry a code; route them to the trailing -1 (missing) slot.
+    labels, uniques = pd.factorize(np.where(flat == "", None, flat), use_na_sentinel=True)
+    category = {code: i for i, code in enumerate(dtype.categories)}
+    resolved = _resolve_unique_cells(uniques, code_list)
+    lookup = np.array([category.get(code, -1) for code in resolved] + [-1], dtype=np.int16)
+    matrix = lookup[labels].reshape(block.shape)
+
+    # a new frame rather than `out.isetitem`: the kept columns would otherwise stay
+    # views of the raw object block, holding every raw cell string in memory
+    codes = dict(zip(positions, range(len(positions))))
+    columns = [
+        pd.Series(pd.Categorical.from_codes(matrix[:, codes[pos]], dtype=dtype), index=df.index) if pos in codes
+        else df.iloc[:, pos].copy()
+        for pos in range(len(df.columns))
+    ]
+    out = pd.concat(columns, axis=1)
+    out.columns = df.columns
+    return out
+
+
+# -------------------------------
+# Column Schema
+# -------------------------------
+# Shift groups of the duty chart: column name prefix -> label in reports.
+SHIFT_LABELS = [
+    ("Morning", "Morning 8.00 to 15.30"),
+    ("Evening", "Evening 12.30 to 20.00"),
+    ("Night", "Night 20.00 to 8.00"),
+    ("General", "General"),
+    ("W-Off", "W-Off"),
+    ("Leave", "Leave"),
+]
+
+NIGHT_COLUMN = "Night 20.00 to 8.00"
+HIDDEN_COLUMNS = ["Duty Leave_10"]
+
+# --- card colors, matched by substring of the column name ---
+CARD_COLORS = {
+    "MORNING": "#dceeff",   # soft blue
+    "EVENING": "#ffe6cc",   # soft orange
+    "NIGHT":   "#eadcff",   # soft purple
+    "W-OFF":   "#d9f7d9",   # mint green
+    "LEAVE":   "#ffd6d6",   # light red
+    "GENERAL": "#e6f2ff",   # very soft blue
+    "C-OFF":   "#d6f5f5",   # soft teal (new)
+}
+DEFAULT_CARD_COLOR = "#f2f2f2"
+
+# kind: the SHIFT_LABELS prefix the name starts with (None for Date, Day, ...);
+# label: the shift's name in reports; night: the night-shift carry-over applies
+ColumnInfo = collections.namedtuple("ColumnInfo", "name kind label color hidden night")
+
+
+@functools.lru_cache(maxsize=1024)
+def column_info(name):
+    """How every view treats a sheet (or view) column of this name, worked out once per name."""
+    kind, label = next(((prefix, label) for prefix, label in SHIFT_LABELS if name.startswith(prefix)), (None, name))
+    upper = name.upper()
+    color = next((color for key, color in CARD_COLORS.items() if key in upper), DEFAULT_CARD_COLOR)
+    hidden = name == "Day" or name in HIDDEN_COLUMNS
+    night = " ".join(name.split()).startswith(NIGHT_COLUMN)
+    return ColumnInfo(name, kind, label, color, hidden, night)
+
+
+@functools.lru_cache(maxsize=16)
+def column_schema(columns):
+    """`ColumnInfo` of each of `columns` (a tuple), once per header version."""
+    return tuple(column_info(c) for c in columns)
+
+
+def is_night_column(col):
+    return column_info(col).night
+
+
+def shift_label(col):
+    return column_info(col).label
+
+
+# -------------------------------
+# Per-Date Attendance Index
+# -------------------------------
+
+
+def resolve_attendance(df, target_date, code_to_name):
+    """Reference pandas implementation of one day's attendance view (or None)."""
+    data = df[df["Date"] == target_date].astype(object)
+    if data.empty: return None
+
+    data = data.replace("", pd.NA).dropna(axis=1, how="all")
+    day_name = target_date.strftime("%A")
+    formatted_date_part = target_date.strftime("%d-%m-%Y")
+    data["Date_display"] = f"{day_name}, {formatted_date_part}"
+
+    data = data.drop(columns=[c for c in data.columns if column_info(c).hidden])
+
+    # Night Shift Logic
+    night_cols = [c for c in data.columns if is_night_column(c)]
+    yesterday = target_date - datetime.timedelta(days=1)
+    prev = df[df["Date"] == yesterday]
+    if not prev.empty:
+        for col in night_cols:
+            yesterday_people = set(prev[col].dropna().astype(str).str.strip().str.upper())
+            data[col] = data[col].apply(lambda x: "" if str(x).strip().upper() in yesterday_people else x)
+
+    eligible_night_cols = [c for c in night_cols if data[c].dropna().astype(str).str.strip().any()]
+    eligible_series = [data[c].copy() for c in eligible_night_cols]
+    if night_cols: original_start = data.columns.get_loc(night_cols[0])
+    else: original_start = len(data.columns)
+    data = data.drop(columns=night_cols)
+    for i, series in enumerate(eligible_series):
+        new_name = NIGHT_COLUMN if i == 0 else f"{NIGHT_COLUMN}_{i+1}"
+        data.insert(original_start + i, new_name, series)
+
+    # Codes to Names
+    for col in data.columns:
+        if col not in ["Date", "Date_display"]:
+            data[col] = data[col].map(code_to_name).fillna(data[col])
+
+    # General Shift Logic
+    general_cols = [c for c in data.columns if column_info(c).kind == "General"]
+    general_count = sum(data[col].dropna().astype(str).str.strip().replace("", pd.NA).dropna().count() for col in general_cols if col in data.columns)
+
+    if general_count > 3:
+        data = data.drop(columns=[c for c in general_cols if c in data.columns])
+    else:
+        def merge_general(row):
+            names = [str(row[c]).strip() for c in general_cols if c in row and pd.notna(row[c]) and str(row[c]).strip() != ""]
+            return ", ".join(names)
+        if general_cols:
+            first_general_idx = data.columns.get_loc(general_cols[0]) if general_cols[0] in data.columns else -1
+            if first_general_idx != -1:
+                data.insert(first_general_idx, "General Shift", data.apply(merge_general, axis=1))
+        data = data.drop(columns=[c for c in general_cols if c in data.columns])
+
+    data.reset_index(drop=True, inplace=True)
+    data = data.drop(columns=["Date"], errors="ignore")
+    data = data.rename(columns={"Date_display": "Date"})
+    data = data.drop(columns=["Date_1"], errors="ignore")
+    return data
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and value == "") or (not isinstance(value, str) and pd.isna(value))
+
+
+_DISPLAY_DATE = ColumnInfo("Date_display", None, "Date_display", DEFAULT_CARD_COLOR, False, False)
+
+
+def _resolve_single_row(target_date, schema, row, yesterday_sets, code_to_name):
+    """`resolve_attendance` for a date with exactly one sheet row, in plain Python.
+
+    `schema` is the `column_schema` of the frame's columns. Returns the (column
+    names, cell values) of the one-row result.
+    """
+    cells = [(info, v) for info, v in zip(schema, row) if not _is_blank(v) and not info.hidden]
+    cells.append((_DISPLAY_DATE, f"{target_date.strftime('%A')}, {target_date.strftime('%d-%m-%Y')}"))
+
+    # Night Shift Logic: drop people who were already on last night's shift
+    night_idx = [i for i, (info, _) in enumerate(cells) if info.night]
+    if night_idx:
+        kept = []
+        for i in night_idx:
+            info, v = cells[i]
+            if yesterday_sets is not None and str(v).strip().upper() in yesterday_sets.get(info.name, ()):
+                v = ""
+            if str(v).strip():
+                kept.append(v)
+        start = night_idx[0]
+        others = [cell for i, cell in enumerate(cells) if i not in set(night_idx)]
+        renamed = [(column_info(NIGHT_COLUMN if i == 0 else f"{NIGHT_COLUMN}_{i+1}"), v) for i, v in enumerate(kept)]
+        cells = others[:start] + renamed + others[start:]
+
+    # Codes to Names
+    cells = [(info, v if info.name in ("Date", "Date_display") else code_to_name.get(v, v)) for info, v in cells]
+
+    # General Shift Logic
+    general_idx = [i for i, (info, _) in enumerate(cells) if info.kind == "General"]
+    if general_idx:
+        names = [str(v).strip() for i, (_, v) in enumerate(cells) if i in general_idx and str(v).strip() != ""]
+        others = [cell for i, cell in enumerate(cells) if i not in set(general_idx)]
+        if len(names) > 3:
+            cells = others
+        else:
+            start = general_idx[0]
+            cells = others[:start] + [(column_info("General Shift"), ", ".join(names))] + others[start:]
+
+    cells = [(info, v) for info, v in cells if info.name not in ("Date", "Date_1")]
+    return [("Date" if info is _DISPLAY_DATE else info.name) for info, _ in cells], [v for _, v in cells]
+
+
+class _DateResolver:
+    """What resolving single dates of one frame needs, worked out once per frame."""
+
+    def __init__(self, df, code_to_name):
+        self.df = df
+        self.code_to_name = code_to_name
+        self.columns = list(df.columns)
+        self.schema = column_schema(tuple(self.columns))
+        self.night_positions = [i for i, info in enumerate(self.schema) if info.night]
+        self.rows_by_date = {}
+        for pos, d in enumerate(df["Date"].tolist()):
+            if not _is_blank(d):
+                self.rows_by_date.setdefault(d, []).append(pos)
+
+    def _night_sets(self, values, positions):
+        if not positions: return None
+        return {
+            self.columns[i]: {str(values[p][i]).strip().upper() for p in positions if not _is_blank(values[p][i])}
+            for i in self.night_positions
+        }
+
+    def resolve(self, dates):
+        """{date: (columns, rows)} for those of `dates` that are in the frame."""
+        found = [(d, self.rows_by_date[d]) for d in dates if d in self.rows_by_date]
+        # only the rows of these dates (and of the nights before them) become Python objects
+        wanted = sorted({p for d, positions in found if len(positions) == 1
+                         for p in positions + self.rows_by_date.get(d - datetime.timedelta(days=1), [])})
+        values = dict(zip(wanted, self.df.iloc[wanted].to_numpy(dtype=object)))
+        index = {}
+        for d, positions in found:
+            if len(positions) == 1:
+                yesterday = self.rows_by_date.get(d - datetime.timedelta(days=1))
+                cols, row = _resolve_single_row(
+                    d, self.schema, values[positions[0]], self._night_sets(values, yesterday), self.code_to_name)
+                index[d] = (cols, [row])
+            else:
+                data = resolve_attendance(self.df, d, self.code_to_name)
+                index[d] = (list(data.columns), data.to_numpy(dtype=object).tolist())
+        return index
+
+
+@perf.timed("build_date_index")
+def build_date_index(df, code_to_name, dates=None):
+    """Resolve every date in `df` once: date -> (columns, rows) of its attendance view.
+
+    Dates with a single sheet row (the normal case) are resolved in plain Python;
+    dates that appear on several rows go through `resolve_attendance`. With
+    `dates`, only those dates are resolved.
+    """
+    resolver = _DateResolver(df, code_to_name)
+    return resolver.resolve(resolver.rows_by_date if dates is None else dates)
+
+
+@perf.timed("attendance_for_date")
+def attendance_for_date(date_index, target_date):
+    """O(1) lookup of one day's attendance view; None when the date is not in the sheet."""
+    entry = date_index.get(target_date)
+    if entry is None: return None
+    columns, rows = entry
+    return pd.DataFrame(rows, columns=columns)
+
+
+def week_attendance(date_index, monday):
+    """[(day, attendance frame or None)] for the 7 days starting at `monday`."""
+    days = [monday + datetime.timedelta(days=i) for i in range(7)]
+    return [(day, attendance_for_date(date_index, day)) for day in days]
+
+
+# -------------------------------
+# Employee Assignments (long format)
+# -------------------------------
+@perf.timed("build_assignments")
+def build_assignments(df, code_to_name):
+    """Melt the sheet into one row per (date, employee_code, shift_label).
+
+    `row` keeps the sheet row each assignment came from, in sheet order.
+    """
+    positions = [i for i, c in enumerate(df.columns) if c != "Date"]
+    block = df.iloc[:, positions].to_numpy(dtype=object)
+    labels, uniques = pd.factorize(block.ravel(), use_na_sentinel=True)
+
+    known = {code.upper() for code in code_to_name}
+    normalized = [str(u).strip().upper() for u in uniques]
+    lookup = np.array([n if n in known else None for n in normalized] + [None], dtype=object)
+    codes = lookup[labels].reshape(block.shape)
+
+    dates = df["Date"].to_numpy(dtype=object)
+    rows, cols = np.nonzero(pd.notna(codes) & pd.notna(dates)[:, None])
+    schema = column_schema(tuple(df.columns))
+    col_labels = np.array([schema[i].label for i in positions], dtype=object)
+    return pd.DataFrame({
+        "date": dates[rows],
+        "employee_code": codes[rows, cols],
+        "shift_label": col_labels[cols],
+        "row": rows,
+    })
+
+
+@perf.timed("group_assignments")
+def group_assignments(df, assignments):
+    """{(year, month): {employee_code: {date: [shift labels]}}} for every month in the sheet.
+
+    Months with sheet rows but no assignments map to an empty dict. When a date
+    appears on several rows, the last row that lists the employee wins.
+    """
+    by_month = {}
+    for d in df["Date"]:
+        if not _is_blank(d):
+            by_month.setdefault((d.year, d.month), {})
+
+    last_row = assignments.groupby(["employee_code", "date"])["row"].transform("max")
+    kept = assignments[assignments["row"] == last_row]
+    for d, code, label in zip(kept["date"], kept["employee_code"], kept["shift_label"]):
+        by_month[(d.year, d.month)].setdefault(code, {}).setdefault(d, []).append(label)
+    return by_month
+
+
+def individual_month_report(month_assignments, code, first_day):
+    """Day-by-day (Day, Shift/Status) table of one employee's month, from a `group_assignments` entry."""
+    shifts_by_date = month_assignments.get(code.upper(), {})
+    next_month = (first_day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    report_data = []
+    for i in range((next_month - first_day).days):
+        date_dt = first_day + datetime.timedelta(days=i)
+        shifts = " / ".join(shifts_by_date.get(date_dt, []))
+        status = shifts if shifts else "❓ UNRECORDED"
+        report_data.append({"Day": date_dt.strftime('%a, %d %b'), "Shift/Status": status})
+    return pd.DataFrame(report_data)
+
+
+SUMMARY_COLUMNS = ["Month", "Code", "Name"] + [kind for kind, _ in SHIFT_LABELS] + ["Longest night run", "Unrecorded days"]
+
+
+@perf.timed("month_summary")
+def month_summary(df, code_to_name):
+    """Per month and employee: days on each kind of shift, longest run of consecutive nights, unrecorded days.
+
+    One row for every employee in `code_to_name` and every month in `df`, from a
+    single melt of the sheet. Days are counted the way `individual_month_report`
+    shows them: the last row listing the employee wins for a date on several
+    rows, and a day of the month without any shift is unrecorded.
+    """
+    assignments = build_assignments(df, code_to_name)
+    last_row = assignments.groupby(["employee_code", "date"])["row"].transform("max")
+    kept = assignments[assignments["row"] == last_row]
+    kept = kept.assign(
+        month=pd.PeriodIndex(pd.to_datetime(kept["date"]), freq="M"),
+        kind=kept["shift_label"].map({label: kind for kind, label in SHIFT_LABELS}),
+    )
+
+    months = pd.PeriodIndex(sorted({d.replace(day=1) for d in df["Date"] if not _is_blank(d)}), freq="M")
+    codes = [code.upper() for code in code_to_name]
+    index = pd.MultiIndex.from_product([months, codes], names=["month", "employee_code"])
+    kinds = [kind for kind, _ in SHIFT_LABELS]
+    counts = kept.groupby(["month", "employee_code", "kind"]).size().unstack("kind")
+    summary = counts.reindex(index=index, columns=kinds).fillna(0).astype(int)
+
+    # runs of consecutive night dates: a run starts where the previous night
+    # is another employee's, in another month, or not the day before
+    nights = kept.loc[kept["kind"] == "Night", ["month", "employee_code", "date"]].drop_duplicates()
+    nights = nights.sort_values(["employee_code", "date"])
+    ordinal = nights["date"].map(datetime.date.toordinal)
+    starts = ((nights["employee_code"] != nights["employee_code"].shift())
+              | (nights["month"] != nights["month"].shift())
+              | (ordinal.diff() != 1))
+    runs = nights.groupby(["month", "employee_code", starts.cumsum()]).size()
+    longest = runs.groupby(level=["month", "employee_code"]).max()
+    summary["Longest night run"] = longest.reindex(index).fillna(0).astype(int)
+
+    recorded = kept.groupby(["month", "employee_code"])["date"].nunique().reindex(index).fillna(0).astype(int)
+    summary["Unrecorded days"] = index.get_level_values("month").days_in_month - recorded
+
+    summary = summary.reset_index()
+    summary.insert(0, "Month", summary.pop("month").astype(str))
+    summary.insert(1, "Code", summary.pop("employee_code"))
+    summary.insert(2, "Name", summary["Code"].map({code.upper(): name for code, name in code_to_name.items()}))
+    summary.columns.name = None
+    return summary.sort_values(["Month", "Name"], kind="stable", ignore_index=True)[SUMMARY_COLUMNS]
+
+
+def merge_team_assignments(rosters):
+    """{date: [(team key, shift label, employee code)]} over several teams' rosters, for cross-team views.
+
+    Lazy like the rosters: a month is merged the first time one of its dates is read.
+    """
+    dates_by_month = {}
+    for roster in rosters.values():
+        for d in roster.date_hashes:
+            dates_by_month.setdefault(_month_of(d), set()).add(d)
+
+    def merge_month(month):
+        merged = {d: [] for d in dates_by_month[month]}
+        for team, roster in rosters.items():
+            for code, shifts_by_date in roster.assignments_by_month.get(month, {}).items():
+                for d, labels in shifts_by_date.items():
+                    merged[d].extend((team, label, code) for label in labels)
+        return merged
+
+    return LazyMonths({m: sorted(ds) for m, ds in dates_by_month.items()}, merge_month, _month_of)
+
+
+# -------------------------------
+# Content Fingerprints
+# -------------------------------
+def row_hashes(df):
+    """One 64-bit hash of the cell values of each row of `df`."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def frame_fingerprint(df, hashes=None):
+    """Short hex digest of the columns and cell values of `df`; equal content gives an equal fingerprint."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update("\x1f".join(map(str, df.columns)).encode())
+    digest.update((row_hashes(df) if hashes is None else hashes).tobytes())
+    return digest.hexdigest()
+
+
+def date_hashes(df, hashes):
+    """{date: (row hashes of the sheet rows on that date)}; undated rows feed no view and are left out."""
+    by_date = {}
+    for d, h in zip(df["Date"].tolist(), hashes.tolist()):
+        if not _is_blank(d):
+            by_date.setdefault(d, []).append(h)
+    return {d: tuple(hs) for d, hs in by_date.items()}
+
+
+# -------------------------------
+# Lazy Month Chunks
+# -------------------------------
+def _month_of(d):
+    return (d.year, d.month)
+
+
+class LazyMonths(collections.abc.Mapping):
+    """Read-only mapping whose values are computed a month at a time, on first read.
+
+    `keys_by_month` ({(year, month): [keys]}) lists every key up front, so
+    membership, iteration and len() compute nothing; `build_month(month)`
+    returns that month's {key: value} the first time one of its values is read,
+    and `month_of(key)` says which month a key is in. `reuse` seeds months
+    already computed for an earlier version of the data.
+    """
+
+    def __init__(self, keys_by_month, build_month, month_of, reuse=None):
+        self.keys_by_month = keys_by_month
+        self.build_month = build_month
+        self.month_of = month_of
+        self._keys = {k for keys in keys_by_month.values() for k in keys}
+        self._chunks = dict(reuse or {})
+        self._lock = threading.Lock()
+
+    def month(self, month):
+        """{key: value} of one month, computed now if it was not yet."""
+        chunk = self._chunks.get(month)
+        if chunk is None:
+            with self._lock:
+                chunk = self._chunks.get(month)
+                if chunk is None:
+                    chunk = self._chunks[month] = self.build_month(month)
+                    perf.count("roster.months_resolved")
+        return chunk
+
+    def load(self, months=None):
+        """Compute the given months (all of them by default) ahead of the first read."""
+        for month in self.keys_by_month if months is None else months:
+            if month in self.keys_by_month:
+                self.month(month)
+
+    def loaded(self):
+        """{month: chunk} of the months computed so far."""
+        return dict(self._chunks)
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        return self.month(self.month_of(key))[key]
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return (k for keys in self.keys_by_month.values() for k in keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+# -------------------------------
+# Derived Roster
+# -------------------------------
+Roster = collections.namedtuple("Roster", "version df date_index assignments_by_month date_hashes")
+
+
+@perf.timed("build_roster")
+def build_roster(df, code_to_name, previous=None):
+    """Every index the views read, over one parsed (code-extracted) frame.
+
+    `version` is the content fingerprint of `df`; caches of anything rendered
+    from the roster key on it. `date_index` and `assignments_by_month` are
+    `LazyMonths`: a month of history is resolved only once a view reads it.
+
+    Given the `previous` roster, an unchanged frame returns `previous` as is;
+    otherwise its resolved months carry over unless one of their dates changed
+    (or, for the date index, the day before the month, for the night-shift rule).
+    """
+    hashes = row_hashes(df)
+    version = frame_fingerprint(df, hashes)
+    if previous is not None and previous.version == version:
+        return previous
+    by_date = date_hashes(df, hashes)
+    resolver = _DateResolver(df, code_to_name)
+
+    dates_by_month = {}
+    for d in by_date:
+        dates_by_month.setdefault(_month_of(d), []).append(d)
+
+    reuse_days = reuse_months = None
+    if previous is not None and list(previous.df.columns) == list(df.columns):
+        changed = {d for d in by_date.keys() | previous.date_hashes.keys() if by_date.get(d) != previous.date_hashes.get(d)}
+        months = {_month_of(d) for d in changed}
+        day_months = months | {_month_of(d + datetime.timedelta(days=1)) for d in changed}
+        reuse_days = {m: c for m, c in previous.date_index.loaded().items() if m not in day_months}
+        reuse_months = {m: c for m, c in previous.assignments_by_month.loaded().items() if m not in months}
+
+    def resolve_month(month):
+        return resolver.resolve(dates_by_month[month])
+
+    def group_month(month):
+        positions = sorted(p for d in dates_by_month[month] for p in resolver.rows_by_date[d])
+        month_df = df.iloc[positions]
+        return group_assignments(month_df, build_assignments(month_df, code_to_name))
+
+    date_index = LazyMonths(dates_by_month, resolve_month, _month_of, reuse_days)
+    assignments_by_month = LazyMonths({m: [m] for m in dates_by_month}, group_month, lambda m: m, reuse_months)
+    return Roster(version, df, date_index, assignments_by_month, by_date)
@@ -0,0 +1,295 @@
+"""Headless roster queries: the same cached, indexed roster the app shows, as JSON or CSV.
+
+    python roster_api.py day                                  # today's attendance view, as JSON
+    python roster_api.py assignments --date 2026-10-19 --format csv
+    python roster_api.py week --date 2026-10-19               # the week containing that date
+    python roster_api.py individual --employee "Alim JTO" --month 2026-10
+    python roster_api.py summary --month 2026-10 --format csv # shift counts of everyone (all months without --month)
+    python roster_api.py serve --port 8502                    # the same queries over HTTP
+
+Over HTTP: GET /day, /assignments, /week, /individual and /summary take the same options as
+query parameters (team, date, employee, month, format), plus /teams and /health.
+Credentials and teams are read from .streamlit/secrets.toml like the app does
+(falling back to the service account key file); --offline serves the saved
+snapshots only. One-shot commands read the sheet before answering and fall back
+to the snapshot only if that fails. JSON answers carry the roster's status
+(source, stale, fetched_at, error), as /health does.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+import threading
+import tomllib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+from google.oauth2.service_account import Credentials
+
+import perf
+from roster import build_roster, merge_team_assignments
+from roster_store import RosterStore, TeamRosters
+from service import (
+    DEFAULT_TEAM, KEY_FILE, SCOPES, assignments_for_date, code_for_name, day_view, individual_month,
+    open_team_rosters, snapshot_path, team_summary, teams_from_config, today_ist, week_start, week_view,
+)
+from sheets import SheetConnection
+
+logger = logging.getLogger(__name__)
+
+QUERIES = ("day", "assignments", "week", "individual", "summary")
+SECRETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".streamlit", "secrets.toml")
+
+
+# -------------------------------
+# Setup
+# -------------------------------
+def load_secrets(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def _offline_store(team):
+    def fetch():
+        raise ConnectionError("offline: serving the saved snapshot only")
+    build = lambda df, previous: build_roster(df, team.code_to_name, previous)
+    return RosterStore(fetch, build, snapshot_path(team), team.code_to_name, ttl=float("inf"))
+
+
+def open_rosters(secrets, offline=False):
+    """(teams, TeamRosters) from the app's secrets; snapshots only when `offline`."""
+    teams = teams_from_config(secrets.get("teams"))
+    if offline:
+        stores = {key: _offline_store(team) for key, team in teams.items()}
+        return teams, TeamRosters(stores, merge_team_assignments)
+
+    def make_credentials():
+        if "google" in secrets:
+            return Credentials.from_service_account_info(secrets["google"], scopes=SCOPES)
+        return Credentials.from_service_account_file(KEY_FILE, scopes=SCOPES)
+
+    connection = SheetConnection(make_credentials, DEFAULT_TEAM.spreadsheet)
+    return teams, open_team_rosters(connection, teams)
+
+
+# -------------------------------
+# Queries
+# -------------------------------
+def _date(value):
+    return datetime.date.fromisoformat(value) if value else today_ist()
+
+
+def _month(value):
+    if not value:
+        today = today_ist()
+        return today.year, today.month
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+def _status(status):
+    return {"source": status.source, "stale": status.stale, "fetched_at": status.fetched_at, "error": status.error}
+
+
+def _records(frame):
+    """{columns, rows} of a frame, with missing cells as null."""
+    return {"columns": list(frame.columns), "rows": frame.astype(object).where(frame.notna(), None).values.tolist()}
+
+
+class RosterAPI:
+    """Answers roster queries from a TeamRosters, caching each encoded response per data version."""
+
+    def __init__(self, teams, team_rosters, cache_size=512):
+        self.teams = teams
+        self.team_rosters = team_rosters
+        self.cache_size = cache_size
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _roster(self, team_key):
+        key = team_key or next(iter(self.teams))
+        if key not in self.teams:
+            raise LookupError(f"unknown team {key!r}")
+        current = self.team_rosters.get()
+        if key not in current:
+            raise LookupError(f"the roster of team {key!r} could not be loaded")
+        return (self.teams[key], *current[key])
+
+    def query(self, name, params):
+        """(body bytes, content type) of query `name` with string `params` (team, date, employee, month, format)."""
+        if name not in QUERIES:
+            raise LookupError(f"unknown query {name!r}")
+        fmt = params.get("format") or "json"
+        if fmt not in ("json", "csv"):
+            raise ValueError(f"unknown format {fmt!r}")
+        team, roster, status = self._roster(params.get("team"))
+        if name == "individual":
+            args = (params.get("employee"), _month(params.get("month")))
+        elif name == "summary":
+            args = (_month(params["month"]) if params.get("month") else None,)
+        else:
+            args = (_date(params.get("date")),)
+
+        # JSON answers carry the roster's status, so they are cached per status as well
+        key = (name, team.key, roster.version, args, fmt, status if fmt == "json" else None)
+        with self._lock:
+            cached = self._cache.get(key)
+        perf.count("api_cache.lookup")
+        if cached is not None:
+            return cached
+
+        perf.count("api_cache.miss")
+        with perf.timer(f"api.{name}"):
+            payload, frame = getattr(self, f"_{name}")(team, roster, *args)
+            if fmt == "csv":
+                response = (frame.to_csv(index=False).encode(), "text/csv; charset=utf-8")
+            else:
+                payload = {"team": team.key, "version": roster.version, "status": _status(status), **payload}
+                response = (json.dumps(payload, default=str, ensure_ascii=False).encode(), "application/json")
+        with self._lock:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[key] = response
+        return response
+
+    def _day(self, team, roster, day):
+        frame = day_view(roster, day)
+        frame = frame if frame is not None else pd.DataFrame()
+        return {"date": day, **_records(frame)}, frame
+
+    def _assignments(self, team, roster, day):
+        rows = assignments_for_date(roster, team.code_to_name, day)
+        return {"date": day, "assignments": rows}, pd.DataFrame(rows, columns=["employee_code", "name", "shift"])
+
+    def _week(self, team, roster, day):
+        monday = week_start(day)
+        days = week_view(roster, monday)
+        payload = {"monday": monday, "days": [
+            {"date": d, **(_records(frame) if frame is not None else {"columns": [], "rows": []})} for d, frame in days
+        ]}
+        frames = [frame for _, frame in days if frame is not None]
+        return payload, pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def _individual(self, team, roster, employee, month):
+        if not employee:
+            raise ValueError("individual needs an employee name or code")
+        code = code_for_name(team.code_to_name, employee)
+        if code is None:
+            raise LookupError(f"unknown employee {employee!r}")
+        year, month = month
+        frame = individual_month(roster, code, year, month)
+        if frame is None:
+            raise LookupError(f"no rows in the sheet for {year}-{month:02d}")
+        payload = {"employee_code": code, "name": team.code_to_name[code], "month": f"{year}-{month:02d}"}
+        return {**payload, **_records(frame)}, frame
+
+    def _summary(self, team, roster, month):
+        frame = team_summary(roster, team.code_to_name)
+        if month is not None:
+            year, month = month
+            frame = frame[frame["Month"] == f"{year}-{month:02d}"].reset_index(drop=True)
+            if frame.empty:
+                raise LookupError(f"no rows in the sheet for {year}-{month:02d}")
+        return _records(frame), frame
+
+    def teams_json(self):
+        return json.dumps([{"key": t.key, "label": t.label} for t in self.teams.values()]).encode()
+
+    def health_json(self):
+        current = self.team_rosters.get()
+        return json.dumps({
+            key: {"version": roster.version, **_status(status)} for key, (roster, status) in current.items()
+        }, default=str).encode()
+
+
+# -------------------------------
+# HTTP
+# -------------------------------
+class Handler(BaseHTTPRequestHandler):
+    api = None  # RosterAPI, set by serve()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        name = url.path.strip("/")
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        status, content_type = 200, "application/json"
+        try:
+            if name == "teams":
+                body = self.api.teams_json()
+            elif name == "health":
+                body = self.api.health_json()
+            else:
+                body, content_type = self.api.query(name, params)
+        except LookupError as exc:
+            status, body = 404, json.dumps({"error": str(exc)}).encode()
+        except ValueError as exc:
+            status, body = 400, json.dumps({"error": str(exc)}).encode()
+        except Exception as exc:  # the roster could not be loaded (offline, API or auth error)
+            logger.exception("GET %s failed", self.path)
+            status, content_type = 503, "application/json"
+            body = json.dumps({"error": f"{type(exc).__name__}: {exc}"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def serve(api, host, port):
+    Handler.api = api
+    server = ThreadingHTTPServer((host, port), Handler)
+    logger.info("Serving roster queries on http://%s:%d", host, port)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Query the duty chart without the Streamlit UI.")
+    parser.add_argument("command", choices=QUERIES + ("serve",))
+    parser.add_argument("--team", help="team key (default: the first configured team)")
+    parser.add_argument("--date", help="YYYY-MM-DD (default: today, IST)")
+    parser.add_argument("--employee", help="employee name or code, for individual")
+    parser.add_argument("--month", help="YYYY-MM, for individual (default: this month) and summary (default: all)")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--secrets", default=SECRETS_PATH, help="secrets.toml with [google] and [teams]")
+    parser.add_argument("--offline", action="store_true", help="serve the saved snapshots, never call Google Sheets")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.offline:
+        logging.getLogger("roster_store").setLevel(logging.ERROR)  # every fetch fails by design
+
+    teams, team_rosters = open_rosters(load_secrets(args.secrets), offline=args.offline)
+    api = RosterAPI(teams, team_rosters)
+    if args.command == "serve":
+        serve(api, args.host, args.port)
+        return
+    params = {"team": args.team, "date": args.date, "employee": args.employee, "month": args.month, "format": args.format}
+    try:
+        # read the sheet before answering; the background load `get()` starts would die with the process
+        team_rosters.refresh([args.team or next(iter(teams))])
+        body, _ = api.query(args.command, params)
+    except (LookupError, ValueError) as exc:
+        parser.exit(2, f"error: {exc}\n")
+    except Exception as exc:  # the roster could not be loaded (offline, API or auth error)
+        parser.exit(1, f"error: {type(exc).__name__}: {exc}\n")
+    sys.stdout.write(body.decode())
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import collections
+import datetime
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import perf
+
+logger = logging.getLogger(__name__)
+
+# Bump when the parsed frame layout changes so old snapshots are ignored.
+SNAPSHOT_VERSION = 2
+
+Status = collections.namedtuple("Status", "fetched_at source stale error")
+
+# One duty chart: a worksheet (index or title) of a spreadsheet, with its own code -> name map.
+Team = collections.namedtuple("Team", "key label spreadsheet worksheet code_to_name")
+
+
+# -------------------------------
+# On-disk Snapshot
+# -------------------------------
+def save_snapshot(df, path, codes):
+    """Write the parsed (code-extracted) frame to `path` as Parquet, atomically."""
+    snap = df.copy()
+    snap.attrs = {
+        "schema_version": SNAPSHOT_VERSION,
+        "saved_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "codes": sorted(codes),
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    snap.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def load_snapshot(path, codes):
+    """(frame, saved_at) from `path`, or None if missing, unreadable or from another schema/code list."""
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        logger.warning("Ignoring unreadable roster snapshot %s", path, exc_info=True)
+        return None
+    attrs = df.attrs
+    if attrs.get("schema_version") != SNAPSHOT_VERSION or list(attrs.get("codes", [])) != sorted(codes):
+        logger.info("Ignoring roster snapshot %s from another schema or code list", path)
+        return None
+    df.attrs = {}
+    return df, datetime.datetime.fromisoformat(attrs["saved_at"])
+
+
+# -------------------------------
+# Roster Store
+# -------------------------------
+class RosterStore:
+    """Process-wide holder of the current roster, backed by an on-disk snapshot.
+
+    `fetch()` returns the freshly parsed frame from the sheet and `build(df, previous)`
+    the derived roster the views read, reusing whatever of the `previous` roster
+    (None on the first build) is still valid. On a cold start with a snapshot on disk, the
+    snapshot is served at once while the first fetch runs in a background
+    thread. If a fetch fails, the last good roster (or the snapshot) keeps being
+    served and `Status.stale` / `Status.error` say so.
+
+    With `start_refresher()` running, fetching and rebuilding happen only on the
+    refresher thread and the new (roster, status) pair is swapped in as one
+    object, so `get()` never waits on the Sheets API after the first load.
+    Without it, `get()` re-fetches inline once `ttl` seconds have passed.
+    """
+
+    def __init__(self, fetch, build, snapshot_path, codes, ttl=60):
+        self.fetch = fetch
+        self.build = build
+        self.snapshot_path = snapshot_path
+        self.codes = list(codes)
+        self.ttl = ttl
+        self.current = None  # (roster, Status), replaced as a whole
+        self.checked_at = 0.0
+        self.stats = collections.Counter()
+        self._frame = None
+        self._saved_frame = None
+        self._loading = False
+        self._refresher = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def get(self):
+        """(roster, Status) to render from."""
+        with self._lock:
+            if self.current is None and not self._loading and self._serve_snapshot():
+                self._loading = True
+                threading.Thread(target=self._background_load, name="roster-first-load", daemon=True).start()
+            refresher_running = self._refresher is not None and self._refresher.is_alive()
+            due = not self._loading and (
+                self.current is None or (not refresher_running and time.time() - self.checked_at >= self.ttl))
+        if due:
+            self.stats["inline_refreshes"] += 1
+            perf.count("roster_store.miss")
+            with perf.timer("roster_refresh"):
+                self._refresh(raise_if_empty=True)
+        else:
+            perf.count("roster_store.hit")
+        return self.current
+
+    def refresh(self):
+        """(roster, Status) after a blocking fetch, or from the snapshot if it fails; for one-shot callers.
+
+        `get()` would serve an existing snapshot and fetch in a daemon thread that a
+        short-lived process exits before it finishes.
+        """
+        perf.count("roster_store.miss")
+        with perf.timer("roster_refresh"):
+            self._refresh(force=True, raise_if_empty=True)
+        return self.current
+
+    # --- background refresher ---
+    def start_refresher(self, interval=45, jitter=5, max_backoff=600):
+        """Refresh every `interval` +/- `jitter` seconds; back off exponentially (up to `max_backoff`) on errors."""
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(
+                target=self._run_refresher, args=(interval, jitter, max_backoff), name="roster-refresher", daemon=True)
+            self._refresher.start()
+
+    def stop_refresher(self):
+        self._stop.set()
+
+    def _run_refresher(self, interval, jitter, max_backoff):
+        failures = 0
+        while True:
+            delay = interval if not failures else min(max_backoff, interval * 2 ** failures)
+            if self._stop.wait(max(1.0, delay + random.uniform(-jitter, jitter))):
+                return
+            with perf.timer("roster_refresh"):
+                ok = self._refresh(force=True)
+            if ok:
+                failures = 0
+            else:
+                failures += 1
+                logger.info("Roster refresh failed %d time(s) in a row, backing off", failures)
+
+    # --- loading ---
+    def _build(self, df):
+        return self.build(df, self.current[0] if self.current is not None else None)
+
+    def _serve_snapshot(self):
+        snap = load_snapshot(self.snapshot_path, self.codes)
+        if snap is None:
+            return False
+        df, saved_at = snap
+        self.current = (self._build(df), Status(saved_at, "snapshot", True, None))
+        logger.info("Serving roster snapshot from %s while the sheet loads", saved_at.isoformat())
+        return True
+
+    def _background_load(self):
+        try:
+            self._refresh(force=True)
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def _refresh(self, force=False, raise_if_empty=False):
+        """Fetch, rebuild if the frame changed, and swap in; False if the fetch failed.
+
+        With nothing to serve yet (no earlier load, no snapshot), a failed fetch
+        re-raises when `raise_if_empty` is set.
+        """
+        with self._refresh_lock:
+            fresh = self.current is not None and self.current[1].source == "sheet"
+            if not force and fresh and time.time() - self.checked_at < self.ttl:
+                return True  # another session refreshed while we waited
+            try:
+                df = self.fetch()
+            except Exception as exc:
+                self.checked_at = time.time()
+                self.stats["failed_refreshes"] += 1
+                logger.warning("Sheet fetch failed, serving last good roster", exc_info=True)
+                if self.current is None and not self._serve_snapshot():
+                    if raise_if_empty:
+                        raise
+                    return False
+                roster, status = self.current
+                self.current = (roster, status._replace(stale=True, error=f"{type(exc).__name__}: {exc}"))
+                return False
+
+            roster = self.current[0] if self.current is not None and df is self._frame else self._build(df)
+            self.current = (roster, Status(datetime.datetime.now(datetime.timezone.utc), "sheet", False, None))
+            self._frame = df
+            self.checked_at = time.time()
+            self.stats["refreshes"] += 1
+            if df is not self._saved_frame:
+                try:
+                    save_snapshot(df, self.snapshot_path, self.codes)
+                    self._saved_frame = df
+                except Exception:
+                    logger.warning("Could not write roster snapshot %s", self.snapshot_path, exc_info=True)
+            return True
+
+
+# -------------------------------
+# Several Teams
+# -------------------------------
+class TeamRosters:
+    """One `RosterStore` per team, read concurrently, plus a merged cross-team index.
+
+    Each store keeps its own snapshot, refresher and version, so teams never wait
+    on each other's sheets. `merge({key: roster})` builds the cross-team index;
+    it is rebuilt only when some team's version changed.
+    """
+
+    def __init__(self, stores, merge, max_workers=4):
+        self.stores = dict(stores)
+        self.merge = merge
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.stores))),
+                                        thread_name_prefix="roster-load")
+        self._merged = None  # (versions, index)
+        self._lock = threading.Lock()
+
+    def get(self):
+        """{team key: (roster, Status)}, from all stores at once.
+
+        A team with nothing to serve yet is logged and left out; when every team
+        fails, the first error is raised.
+        """
+        if len(self.stores) == 1:
+            (key, store), = self.stores.items()
+            return {key: store.get()}
+        futures = {key: self._pool.submit(store.get) for key, store in self.stores.items()}
+        current, errors = {}, []
+        for key, future in futures.items():
+            try:
+                current[key] = future.result()
+            except Exception as exc:
+                logger.warning("Could not load the roster of team %r", key, exc_info=True)
+                errors.append(exc)
+        if errors and not current:
+            raise errors[0]
+        return current
+
+    def refresh(self, keys=None):
+        """Blocking `RosterStore.refresh()` of the teams in `keys` (all by default); unknown keys are skipped."""
+        stores = [store for key, store in self.stores.items() if keys is None or key in keys]
+        for future in [self._pool.submit(store.refresh) for store in stores]:
+            future.result()
+
+    def merged(self, current):
+        """Cross-team index over the rosters in `current` (as returned by `get()`)."""
+        versions = tuple(sorted((key, roster.version) for key, (roster, _) in current.items()))
+        with self._lock:
+            if self._merged is None or self._merged[0] != versions:
+                self._merged = (versions, self.merge({key: roster for key, (roster, _) in current.items()}))
+            return self._merged[1]
@@ -0,0 +1,254 @@
+import collections
+import datetime
+import functools
+import logging
+import os
+import re
+import threading
+
+import pytz
+
+import perf
+from roster import (
+    SHIFT_LABELS, attendance_for_date, build_roster, extract_employee_codes, individual_month_report,
+    merge_team_assignments, month_summary, parse_values, sorted_codes, week_attendance,
+)
+from roster_store import RosterStore, Team, TeamRosters
+from sheets import DeltaSync
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Teams & Configuration
+# -------------------------------
+code_to_name = {
+    "R": "Rahyanath JTO", "K": "Khamarunneesa JTO", "A": "Alim JTO", "P": "Pradeep JTO",
+    "SHA": "Shafeeq SDE", "B": "Bahna JTO", "SH": "Shihar JTO", "ST": "Sreejith JTO ",
+    "I": "Ilyas SDE", "JM": "Jithush JTO", "JD": "Jimshad JTO", "RK": "Rajesh JTO",
+    "RKM": "Riyaz JTO", "AMP": "Abdulla SDE", "N": "Naveen JTO"
+}
+
+# Teams: each one is a worksheet (index or title) with its own code map. Other NOCs or
+# archived yearly tabs go in the secrets as [teams.<key>] with label, spreadsheet,
+# worksheet and a [teams.<key>.codes] table; without any, only this team is served.
+DEFAULT_TEAM = Team("onenoc", "MLP ONENOC", "MLP ONENOC DUTYCHART", 0, code_to_name)
+
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+KEY_FILE = "attendance-app-479515-a2c99015276e.json"
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# "delta": after the first read, re-read only rows near today and appended rows.
+# "full": re-read the whole sheet on every refresh.
+# Either way only rows that changed are re-parsed, and an unchanged sheet rebuilds nothing.
+SYNC_MODE = "delta"
+
+# Full reads fetch and parse this many rows per request, so a long chart never sits in
+# memory as raw cells all at once. None reads the whole sheet in one request.
+PAGE_ROWS = 5000
+
+# Last good parsed roster of each team, served on cold start and when Google Sheets is unavailable.
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# Background refresh: every REFRESH_INTERVAL +/- REFRESH_JITTER seconds, so readers never wait on
+# the Sheets API; after failed fetches the wait doubles up to REFRESH_MAX_BACKOFF seconds.
+REFRESH_INTERVAL = 45
+REFRESH_JITTER = 5
+REFRESH_MAX_BACKOFF = 600
+
+# First loads of several teams run on at most this many threads.
+LOAD_WORKERS = 4
+
+# The store of each team whose refresher runs in this process. A new store for a team
+# (the app's resource cache was cleared, say) stops the refresher of the one it replaces,
+# so dropped stores don't keep polling the Sheets API on the shared quota.
+_refreshing = {}
+_refreshing_lock = threading.Lock()
+
+
+def teams_from_config(configured):
+    """{key: Team} from a `teams` secrets table; just DEFAULT_TEAM when there is none."""
+    if not configured:
+        return {DEFAULT_TEAM.key: DEFAULT_TEAM}
+    return {
+        key: Team(key, cfg.get("label", key), cfg["spreadsheet"], cfg.get("worksheet", 0), dict(cfg["codes"]))
+        for key, cfg in configured.items()
+    }
+
+
+# -------------------------------
+# Roster Stores
+# -------------------------------
+@perf.timed("parse_grid")
+def parse_grid(values, code_list):
+    return extract_employee_codes(parse_values(values), code_list)
+
+
+def snapshot_path(team):
+    return os.path.join(SNAPSHOT_DIR, f"roster-{team.key}.parquet")
+
+
+def warm_roster(roster, today):
+    """Resolve the months the default views read (this week +/- one, this and last month).
+
+    Rosters resolve a month on first read; doing these here, on the thread that
+    built the roster, keeps that work off the first page view after a refresh.
+    Older history is still resolved only when a view asks for it.
+    """
+    days = (today - datetime.timedelta(days=13), today, today + datetime.timedelta(days=13))
+    last_month = today.replace(day=1) - datetime.timedelta(days=1)
+    roster.date_index.load({(d.year, d.month) for d in days})
+    roster.assignments_by_month.load({(today.year, today.month), (last_month.year, last_month.month)})
+    return roster
+
+
+def new_roster_store(team, sheet):
+    # Known employee codes, sorted by length descending
+    parse = functools.partial(parse_grid, code_list=sorted_codes(team.code_to_name))
+    if SYNC_MODE == "delta":
+        fetch = DeltaSync(sheet, parse, page_rows=PAGE_ROWS).refresh
+    else:
+        fetch = DeltaSync(sheet, parse, full_every=1, page_rows=PAGE_ROWS).refresh
+    build = lambda df, previous: warm_roster(build_roster(df, team.code_to_name, previous), today_ist())
+    store = RosterStore(fetch, build, snapshot_path(team), team.code_to_name, ttl=60)
+    with _refreshing_lock:
+        replaced = _refreshing.get(team.key)
+        _refreshing[team.key] = store
+    if replaced is not None:
+        replaced.stop_refresher()
+        logger.info("Stopped the refresher of the replaced %r roster store", team.key)
+    store.start_refresher(REFRESH_INTERVAL, REFRESH_JITTER, REFRESH_MAX_BACKOFF)
+    return store
+
+
+def open_team_rosters(connection, teams):
+    """TeamRosters over every team in `teams`; worksheets are opened by each store's first fetch."""
+    stores = {key: new_roster_store(team, connection.handle(team.spreadsheet, team.worksheet)) for key, team in teams.items()}
+    return TeamRosters(stores, merge_team_assignments, max_workers=LOAD_WORKERS)
+
+
+# -------------------------------
+# Queries
+# -------------------------------
+def today_ist():
+    return datetime.datetime.now(IST).date()
+
+
+def week_start(day):
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def code_for_name(code_to_name, name):
+    """Employee code for a display name, or for a code given as is; None if unknown."""
+    if name in code_to_name:
+        return name
+    return {v: k for k, v in code_to_name.items()}.get(name)
+
+
+def day_view(roster, day):
+    """The attendance view of one day (as the cards show it), or None when the date is not in the sheet."""
+    return attendance_for_date(roster.date_index, day)
+
+
+def week_view(roster, monday):
+    """[(day, attendance view or None)] for the week starting at `monday`."""
+    return week_attendance(roster.date_index, monday)
+
+
+def assignments_for_date(roster, code_to_name, day):
+    """[{employee_code, name, shift}] of everyone on the chart on `day`, in shift order."""
+    month = roster.assignments_by_month.get((day.year, day.month), {})
+    order = {label: i for i, (_, label) in enumerate(SHIFT_LABELS)}
+    rows = [
+        {"employee_code": code, "name": code_to_name.get(code, code), "shift": label}
+        for code, shifts_by_date in month.items() for label in shifts_by_date.get(day, [])
+    ]
+    return sorted(rows, key=lambda r: (order.get(r["shift"], len(order)), r["name"]))
+
+
+def individual_month(roster, code, year, month):
+    """(Day, Shift/Status) table of one employee's month, or None when the sheet has no rows for it."""
+    month_assignments = roster.assignments_by_month.get((year, month))
+    if month_assignments is None:
+        return None
+    return individual_month_report(month_assignments, code, datetime.date(year, month, 1))
+
+
+def team_summary(roster, code_to_name):
+    """`month_summary` of every employee over every month of the roster, newest month first."""
+    summary = month_summary(roster.df, code_to_name)
+    return summary.sort_values("Month", ascending=False, kind="stable", ignore_index=True)
+
+
+# -------------------------------
+# Name Search
+# -------------------------------
+def _tokens(text):
+    return re.sub(r"[^0-9a-z]+", " ", text.casefold()).split()
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Employee search by display name or code, built once per code map.
+
+    Names and queries are compared as lower-case word tokens (punctuation
+    dropped). `search` ranks an exact code first, then codes and names whose
+    words start with the query's words, then names containing the query, then,
+    for typos, names sharing enough trigrams with it; ties stay alphabetical.
+    """
+
+    def __init__(self, code_to_name, min_similarity=0.4):
+        self.min_similarity = min_similarity
+        self.names = sorted(code_to_name.values())
+        self._order = {name: i for i, name in enumerate(self.names)}
+        self._by_code = {code.upper(): name for code, name in code_to_name.items()}
+        self._code_prefixes = collections.defaultdict(list)  # code prefix -> names, by code
+        for code in sorted(self._by_code):
+            for n in range(1, len(code)):
+                self._code_prefixes[code[:n]].append(self._by_code[code])
+        self._text = [" ".join(_tokens(name)) for name in self.names]
+        self._prefixes = collections.defaultdict(set)  # word prefix -> ids of names with such a word
+        self._grams = collections.defaultdict(set)     # trigram -> ids of names containing it
+        self._gram_counts = []
+        for i, text in enumerate(self._text):
+            for token in text.split():
+                for n in range(1, len(token) + 1):
+                    self._prefixes[token[:n]].add(i)
+            grams = _trigrams(text)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._grams[gram].add(i)
+
+    def search(self, query):
+        """Display names matching `query`, best first; every name for an empty query."""
+        tokens = _tokens(query)
+        if not tokens:
+            return list(self.names)
+        ranked = []
+        code = query.strip().upper()
+        if code in self._by_code:
+            ranked.append(self._by_code[code])
+        ranked += self._code_prefixes.get(code, [])
+
+        prefix_ids = set.intersection(*(self._prefixes.get(t, set()) for t in tokens))
+        text = " ".join(tokens)
+        if len(text) >= 3:
+            # only names holding every trigram of the query can contain it
+            postings = sorted((self._grams.get(text[i:i + 3], set()) for i in range(len(text) - 2)), key=len)
+            candidates = set.intersection(*postings)
+        else:
+            candidates = range(len(self._text))
+        substring_ids = {i for i in candidates if i not in prefix_ids and text in self._text[i]}
+        ranked += [self.names[i] for i in sorted(prefix_ids)]
+        ranked += [self.names[i] for i in sorted(substring_ids)]
+
+        if len(text) >= 3 and not ranked:
+            grams = _trigrams(text)
+            shared = collections.Counter(i for gram in grams for i in self._grams.get(gram, ()))
+            similar = [(-2 * n / (len(grams) + self._gram_counts[i]), i) for i, n in shared.items()]
+            ranked += [self.names[i] for score, i in sorted(similar) if -score >= self.min_similarity]
+        return list(dict.fromkeys(ranked))
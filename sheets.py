@@ -0,0 +1,720 @@
+import collections
+import datetime
+import itertools
+import logging
+import random
+import re
+import sys
+import threading
+import time
+
+import pandas as pd
+
+import perf
+
+logger = logging.getLogger(__name__)
+
+# gspread and google.auth are imported on first use only: they take longer to import
+# than the rest of the app, and a start served from the snapshot never needs them.
+
+def column_letter(col):
+    """1-based column number -> A1 column letters (1 -> "A", 28 -> "AB")."""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def column_number(letters):
+    """A1 column letters -> 1-based column number ("AB" -> 28)."""
+    col = 0
+    for ch in letters:
+        col = col * 26 + ord(ch) - ord("A") + 1
+    return col
+
+
+def fetch_grid_size(worksheet):
+    """(rows, columns) of the worksheet's grid now; gspread's `row_count` is as of when it was opened."""
+    metadata = worksheet.spreadsheet.fetch_sheet_metadata()
+    for sheet in metadata["sheets"]:
+        if sheet["properties"]["sheetId"] == worksheet.id:
+            grid = sheet["properties"]["gridProperties"]
+            return grid["rowCount"], grid["columnCount"]
+    raise LookupError(f"worksheet {worksheet.id} is not in the spreadsheet any more")
+
+
+def _trim(rows):
+    """Drop trailing empty cells and rows, the way the Sheets API returns ranges."""
+    rows = [list(r) for r in rows]
+    for r in rows:
+        while r and r[-1] == "":
+            r.pop()
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
+
+
+def _day_key(raw):
+    """(day, month, year) of a dd/mm/YYYY cell, tolerating missing zero padding; None otherwise."""
+    parts = raw.strip().split("/")
+    if len(parts) != 3 or not all(p.isdigit() for p in parts):
+        return None
+    return tuple(int(p) for p in parts)
+
+
+def _pad(row, width):
+    return list(row) + [""] * (width - len(row))
+
+
+# -------------------------------
+# Coalesced, Rate-limited, Retried Calls
+# -------------------------------
+# HTTP statuses worth retrying: request timeout, quota exceeded and server errors.
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+def retry_after(exc):
+    """Seconds to wait before retrying after `exc` (0 when the server gave no hint); None if not retryable."""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        requests = sys.modules.get("requests")
+        transient = (ConnectionError, TimeoutError) + ((requests.ConnectionError, requests.Timeout) if requests else ())
+        return 0.0 if isinstance(exc, transient) else None
+    if status not in RETRY_STATUSES:
+        return None
+    hint = (getattr(response, "headers", None) or {}).get("Retry-After", "")
+    return float(hint) if hint.strip().isdigit() else 0.0
+
+
+class TokenBucket:
+    """At most `rate` requests per second on average, in bursts of up to `burst`."""
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """Take one token, waiting for it if needed; False (taking none) if that would exceed `timeout` seconds."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1  # reserved now, so concurrent callers queue up behind each other
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            if wait > timeout:
+                self.tokens += 1
+                return False
+        if wait:
+            perf.count("api.throttled")
+            self.sleep(wait)
+        return True
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SheetsCaller:
+    """Runs Sheets API calls so that bursts of readers and API hiccups don't reach the page.
+
+    - Concurrent calls with the same key share one in-flight request (and its result
+      or error); the shared result must not be modified.
+    - Every request, retries included, takes a `TokenBucket` token first, keeping the
+      process under the per-user read quota.
+    - 429s, 5xx and connection errors are retried with exponential backoff and full
+      jitter (or the server's Retry-After), up to `max_attempts` requests.
+    - A call gives up, raising the last error, once waiting would run past `budget`
+      seconds from its start.
+    """
+
+    def __init__(self, rate=1.0, burst=10, max_attempts=5, base_delay=1.0, max_delay=30.0, budget=30.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.bucket = TokenBucket(rate, burst, clock, sleep)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = collections.Counter()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def call(self, key, fn):
+        """`fn()`, coalesced with concurrent calls of the same `key`."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            perf.count("api.coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = self._attempts(fn)
+            return flight.result
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _attempts(self, fn):
+        deadline = self.clock() + self.budget
+        for attempt in itertools.count(1):
+            if not self.bucket.acquire(deadline - self.clock()):
+                self.stats["over_budget"] += 1
+                raise TimeoutError(f"no Sheets request slot within the {self.budget:g}s budget")
+            self.stats["requests"] += 1
+            try:
+                return fn()
+            except Exception as exc:
+                hint = retry_after(exc)
+                if hint is None or attempt >= self.max_attempts:
+                    raise
+                delay = max(hint, random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))))
+                if self.clock() + delay > deadline:
+                    self.stats["over_budget"] += 1
+                    raise
+                self.stats["retries"] += 1
+                perf.count("api.retry")
+                logger.info("Sheets call failed (%s), retry %d in %.1fs", exc, attempt, delay)
+                self.sleep(delay)
+
+
+class GuardedWorksheet:
+    """Worksheet stand-in whose reads go through a `SheetsCaller`; anything else passes straight through."""
+
+    def __init__(self, worksheet, caller, key=None):
+        self.worksheet = worksheet
+        self.caller = caller
+        self.key = id(worksheet) if key is None else key
+        self.spreadsheet = _GuardedSpreadsheet(self)
+
+    def get_all_values(self):
+        return self.caller.call((self.key, "get_all_values"), lambda: self.worksheet.get_all_values())
+
+    def batch_get(self, ranges):
+        ranges = list(ranges)
+        return self.caller.call((self.key, "batch_get", tuple(ranges)), lambda: self.worksheet.batch_get(ranges))
+
+    def __getattr__(self, name):
+        return getattr(self.worksheet, name)
+
+
+class _GuardedSpreadsheet:
+    def __init__(self, guarded):
+        self.guarded = guarded
+
+    def get_lastUpdateTime(self):
+        guarded = self.guarded
+        return guarded.caller.call(
+            (guarded.key, "get_lastUpdateTime"), lambda: guarded.worksheet.spreadsheet.get_lastUpdateTime())
+
+    def fetch_sheet_metadata(self):
+        guarded = self.guarded
+        return guarded.caller.call(
+            (guarded.key, "fetch_sheet_metadata"), lambda: guarded.worksheet.spreadsheet.fetch_sheet_metadata())
+
+    def __getattr__(self, name):
+        return getattr(self.guarded.worksheet.spreadsheet, name)
+
+
+# -------------------------------
+# Shared Client & Worksheet Handle
+# -------------------------------
+class SheetConnection:
+    """One authorized gspread client and its worksheet handles, shared by every session.
+
+    Credentials are built and authorized on first use only, and each worksheet
+    is opened once; later calls hand back the same handle. When the access token
+    has expired it is refreshed in place instead of re-authorizing. `stats`
+    counts authorizations, opens, token refreshes and reuses: each `reused()` call
+    (an app rerun that got this connection from the resource cache) and each
+    `worksheet()` call for a worksheet already open, both of which would otherwise
+    have authorized and opened the sheet again.
+
+    Reads through `handle()` go through one `SheetsCaller` (coalescing, rate limit,
+    retries) for the whole connection, and each HTTP request gives up after
+    `request_timeout` seconds.
+    """
+
+    def __init__(self, make_credentials, spreadsheet_name, worksheet_index=0, caller=None, request_timeout=20):
+        self.make_credentials = make_credentials
+        self.spreadsheet_name = spreadsheet_name
+        self.worksheet_index = worksheet_index
+        self.caller = caller or SheetsCaller()
+        self.request_timeout = request_timeout
+        self.credentials = None
+        self.client = None
+        self._worksheets = {}
+        self.stats = collections.Counter()
+        self._lock = threading.Lock()
+
+    def worksheet(self, spreadsheet_name=None, worksheet=None):
+        """Worksheet by index or title, defaulting to the ones given at construction.
+
+        Opening runs outside the lock, so several worksheets can be opened at once.
+        """
+        key = (spreadsheet_name or self.spreadsheet_name, self.worksheet_index if worksheet is None else worksheet)
+        with self._lock:
+            self._authorize()
+            if key in self._worksheets:
+                self._count_reuse()
+                return self._worksheets[key]
+
+        name, which = key
+        spreadsheet = self.client.open(name)
+        handle = spreadsheet.get_worksheet(which) if isinstance(which, int) else spreadsheet.worksheet(which)
+        perf.count("api.open")
+        with self._lock:
+            self.stats["opens"] += 1
+            handle = self._worksheets.setdefault(key, handle)
+        logger.info("Opened %r / %r (%s)", name, which, self.summary())
+        return handle
+
+    def reused(self):
+        """Note a caller handed this shared connection instead of building one; counts once authorized."""
+        with self._lock:
+            if self.client is not None:
+                self._count_reuse()
+
+    def _count_reuse(self):
+        # called with the lock held
+        self.stats["reuses"] += 1
+        if self.stats["reuses"] % 100 == 0:
+            logger.info("Sheets connection: %s", self.summary())
+
+    def refresh_token(self):
+        """Authorize, or refresh the access token if it has expired, before using an open worksheet."""
+        with self._lock:
+            self._authorize()
+
+    def _authorize(self):
+        # called with the lock held
+        if self.client is None:
+            import gspread
+            self.credentials = self.make_credentials()
+            self.client = gspread.authorize(self.credentials)
+            self.client.set_timeout(self.request_timeout)
+            self.stats["authorizations"] += 1
+            perf.count("api.authorize")
+        elif getattr(self.credentials, "expired", False):
+            from google.auth.transport.requests import Request
+            self.credentials.refresh(Request())
+            self.stats["token_refreshes"] += 1
+            perf.count("api.token_refresh")
+            logger.info("Refreshed access token (%s)", self.summary())
+
+    def handle(self, spreadsheet_name=None, worksheet=None):
+        """A `GuardedWorksheet` over a `LazyWorksheet`: authorizes and opens on first use, not when created."""
+        key = (spreadsheet_name or self.spreadsheet_name, self.worksheet_index if worksheet is None else worksheet)
+        return GuardedWorksheet(LazyWorksheet(self, spreadsheet_name, worksheet), self.caller, key)
+
+    def summary(self):
+        s, c = self.stats, self.caller.stats
+        return (f"{s['authorizations']} authorizations, {s['opens']} opens, {s['token_refreshes']} token refreshes, "
+                f"{s['reuses']} reuses avoided an authorize + open; {c['requests']} requests, "
+                f"{c['coalesced']} coalesced, {c['retries']} retries")
+
+
+class LazyWorksheet:
+    """Stand-in for a worksheet that is fetched from `SheetConnection.worksheet()` on first use.
+
+    Nothing is authorized or opened until the first API call, which then runs on
+    whichever thread makes it (the roster refresher, usually). The handle is kept
+    after that, and every later call refreshes an expired access token first.
+    """
+
+    def __init__(self, connection, spreadsheet_name=None, worksheet=None):
+        self.connection = connection
+        self.spreadsheet_name = spreadsheet_name
+        self.which = worksheet
+        self.resolved = None
+
+    def __getattr__(self, name):
+        if self.resolved is None:
+            self.resolved = self.connection.worksheet(self.spreadsheet_name, self.which)
+        else:
+            self.connection.refresh_token()
+        return getattr(self.resolved, name)
+
+
+# -------------------------------
+# In-memory Worksheet
+# -------------------------------
+class FakeSpreadsheet:
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.version = 0
+
+    def get_lastUpdateTime(self):
+        return f"rev-{self.version}"
+
+    def fetch_sheet_metadata(self):
+        ws = self.worksheet
+        ws.calls["fetch_sheet_metadata"] += 1
+        grid = {"rowCount": len(ws.values), "columnCount": max((len(r) for r in ws.values), default=0)}
+        return {"sheets": [{"properties": {"sheetId": ws.id, "gridProperties": grid}}]}
+
+
+class FakeAPIError(Exception):
+    """An HTTP error response from the fake worksheet, shaped like `gspread.exceptions.APIError`."""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+        self.response = collections.namedtuple("Response", "status_code headers")(status, headers)
+
+
+class FakeWorksheet:
+    """In-memory stand-in for `gspread.Worksheet`, for running the sync offline.
+
+    Supports the read calls the app makes (`get_all_values`, `batch_get` with
+    "1:1", "A:A" or "5:20" ranges) and counts them in `calls`. Each read takes
+    `latency` seconds, and while `errors` (HTTP statuses) is not empty, a read
+    fails with the next one as a `FakeAPIError`.
+    """
+
+    def __init__(self, values, title="Sheet1", latency=0.0, errors=()):
+        self.id = 0
+        self.title = title
+        self.values = [list(r) for r in values]
+        # grid size as of opening, like gspread's; the live size is in the spreadsheet metadata
+        self.row_count = len(self.values)
+        self.col_count = max((len(r) for r in self.values), default=0)
+        self.spreadsheet = FakeSpreadsheet(self)
+        self.calls = collections.Counter()
+        self.latency = latency
+        self.errors = collections.deque(errors)
+
+    def _read(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.errors:
+            raise FakeAPIError(self.errors.popleft())
+
+    def get_all_values(self):
+        self._read("get_all_values")
+        rows = _trim(self.values)
+        width = max((len(r) for r in rows), default=0)
+        return [_pad(r, width) for r in rows]
+
+    def _range(self, name):
+        m = re.fullmatch(r"([A-Z]*)(\d*):([A-Z]*)(\d*)", name)
+        if not m:
+            raise ValueError(f"unsupported range {name!r}")
+        first_col, first_row, last_col, last_row = m.groups()
+        r0 = int(first_row) - 1 if first_row else 0
+        r1 = int(last_row) if last_row else len(self.values)
+        c0 = column_number(first_col) - 1 if first_col else 0
+        c1 = column_number(last_col) if last_col else None
+        return _trim(row[c0:c1] for row in self.values[r0:r1])
+
+    def batch_get(self, ranges):
+        self._read("batch_get")
+        return [self._range(name) for name in ranges]
+
+    # --- edits, for simulating people working on the duty chart ---
+    def update_cell(self, row, col, value):
+        while len(self.values) < row:
+            self.values.append([])
+        line = self.values[row - 1]
+        line.extend([""] * (col - len(line)))
+        line[col - 1] = value
+        self.spreadsheet.version += 1
+
+    def append_row(self, values):
+        self.values.append(list(values))
+        self.spreadsheet.version += 1
+
+
+# -------------------------------
+# Incremental (delta) Sync
+# -------------------------------
+def _used(row):
+    """The row without its trailing empty cells, as a tuple."""
+    end = len(row)
+    while end and row[end - 1] == "":
+        end -= 1
+    return tuple(row[:end])
+
+
+def _row_key(row):
+    """Hash of a row's cells, blind to trailing empty cells; equal rows give equal keys."""
+    return hash(_used(row))
+
+
+class DeltaSync:
+    """Keeps a compact record of the last fetched sheet and re-reads only the rows that can have changed.
+
+    After the first full read, a refresh:
+
+    1. skips all reads when the spreadsheet's modified time is unchanged,
+    2. reads the header row and the Date column in one `batch_get`,
+    3. re-reads only the rows dated within [today - window_back, today + window_ahead]
+       plus any rows appended since the last read, and re-parses just those.
+
+    Header changes, or Date column changes outside the window (inserted, deleted
+    or re-sorted rows), fall back to a full read, as does every `full_every`-th
+    refresh so edits to old rows are eventually picked up.
+
+    Either way, only rows whose cells differ from the last read are re-parsed, and
+    when none do the previous frame object is returned unchanged. Rather than the
+    raw grid, only the header, the raw Date column and one hash per row are kept.
+
+    A full read is one `get_all_values`, or with `page_rows`, `batch_get`s of that
+    many rows each down to the grid's current last row, parsed page by page as they
+    arrive, so no more than one page of raw cells is held at a time however long the
+    sheet is.
+
+    `parse` turns a grid (header row + data rows) into the parsed frame; it must
+    parse each row independently so partial grids can be spliced in.
+    """
+
+    def __init__(self, worksheet, parse, window_back=7, window_ahead=45, full_every=30, check_modified=True,
+                 page_rows=None):
+        self.worksheet = worksheet
+        self.parse = parse
+        self.window_back = window_back
+        self.window_ahead = window_ahead
+        self.full_every = full_every
+        self.check_modified = check_modified
+        self.page_rows = page_rows
+        self.header = None    # header row, as wide as the grid
+        self.dates = None     # raw Date cell of every grid row, header first
+        self.row_keys = None  # `_row_key` of every grid row, header first
+        self.frame = None
+        self.modified = None
+        self.refreshes_since_full = 0
+        self.stats = collections.Counter()
+        self._lock = threading.Lock()
+
+    def _modified_time(self):
+        if not self.check_modified: return None
+        perf.count("api.get_lastUpdateTime")
+        return self.worksheet.spreadsheet.get_lastUpdateTime()
+
+    def _read_pages(self, paged):
+        """(header row, grid width, iterator of data-row pages) of the whole sheet."""
+        if not paged:
+            perf.count("api.get_all_values")
+            with perf.timer("sheets_fetch"):
+                grid = self.worksheet.get_all_values()
+            return grid[0], len(grid[0]), iter([grid[1:]])
+
+        # the width is only known once every row is read; pages are parsed as wide as
+        # the sheet's grid and cut down to the used columns at the end
+        perf.count("api.fetch_sheet_metadata")
+        row_count, col_count = fetch_grid_size(self.worksheet)
+
+        def fetch(first, last):
+            perf.count("api.batch_get")
+            with perf.timer("sheets_fetch"):
+                rows, = self.worksheet.batch_get([f"{first}:{last}"])
+            return list(rows) + [[]] * (last - first + 1 - len(rows))
+
+        first_page = [fetch(1, min(row_count, self.page_rows))]
+        header, width = first_page[0][0], max(len(first_page[0][0]), col_count)
+
+        def pages():
+            yield first_page.pop()[1:]
+            for first in range(self.page_rows + 1, row_count + 1, self.page_rows):
+                yield fetch(first, min(row_count, first + self.page_rows - 1))
+        return header, width, pages()
+
+    def _full(self, paged=True, reparse=False):
+        """Read the whole sheet, parsing only rows that differ from the last read (every row with `reparse`)."""
+        modified = self._modified_time()
+        paged = paged and bool(self.page_rows)
+        header, width, pages = self._read_pages(paged)
+        header_row = _pad(header, width)
+        old_keys = self.row_keys or []
+        reuse = (not reparse and self.frame is not None and len(header) <= len(self.header)
+                 and _pad(header, len(self.header)) == self.header)
+        date_col = header.index("Date") if "Date" in header else None
+        used_width = len(header)
+        keys, dates, parts = [_row_key(header)], [header[date_col] if date_col is not None else ""], []
+        last_used, blanks = 0, []  # blanks: new blank rows, parsed only if a used row follows
+        for rows in pages:
+            if any(len(r) > width for r in rows):
+                return self._full(paged=False, reparse=reparse)  # the grid grew while it was read
+            rows = [_pad(r, width) for r in rows]
+            fresh = []  # (grid index, row) of the rows to parse
+            for r in rows:
+                used = _used(r)
+                i = len(keys)
+                keys.append(hash(used))
+                dates.append(r[date_col] if date_col is not None else "")
+                if used:
+                    last_used = i
+                    used_width = max(used_width, len(used))
+                if i < len(old_keys) and reuse:
+                    if keys[i] != old_keys[i]:
+                        fresh.append((i, r))
+                elif not used:
+                    blanks.append(i)
+                else:
+                    fresh.extend((j, [""] * width) for j in blanks)
+                    fresh.append((i, r))
+                    blanks = []
+            if fresh:
+                parts.append(([i for i, _ in fresh], self.parse([header_row] + [r for _, r in fresh])))
+                self.stats["rows_parsed"] += len(fresh)
+            self.stats["rows_fetched"] += len(rows)
+            del rows, fresh  # before the next page is fetched
+        self.stats["full"] += 1
+        self.stats["rows_fetched"] += 1
+        self.modified = modified
+        self.refreshes_since_full = 0
+
+        keys, dates = keys[:last_used + 1], dates[:last_used + 1]
+        if reuse and used_width != len(self.header):
+            # a column came into use or went out of it: the kept rows are the wrong width
+            return self._full(paged=paged, reparse=True)
+        if reuse:
+            if not parts and len(keys) == len(old_keys):
+                return self.frame
+            frame = self._patch(self.frame, parts)
+        elif parts:
+            frame = pd.concat([part for _, part in parts], ignore_index=True) if len(parts) > 1 else parts[0][1]
+        else:
+            frame = self.parse([header_row])
+        if len(frame) > last_used or len(frame.columns) > used_width:
+            frame = frame.iloc[:last_used, :used_width]
+        self.header, self.dates, self.row_keys, self.frame = _pad(header, used_width), dates, keys, frame
+        return frame
+
+    @staticmethod
+    def _patch(frame, parts):
+        """`frame` with `parts` ([(grid indices, parsed frame of those rows)]) written over its rows or after them."""
+        updates, tail = [], []
+        for indices, part in parts:
+            part = part.iloc[:, :len(frame.columns)]
+            inside = sum(i <= len(frame) for i in indices)  # grid index i is frame row i - 1
+            if inside:
+                updates.append(([i - 1 for i in indices[:inside]], part.iloc[:inside]))
+            if inside < len(indices):
+                tail.append(part.iloc[inside:])
+        if updates:
+            frame = frame.copy()
+            for positions, rows in updates:
+                frame.iloc[positions] = rows.to_numpy(dtype=object)
+        if tail:
+            frame = pd.concat([frame] + tail, ignore_index=True)
+        return frame
+
+    def _splice(self, changed, appended):
+        """Re-parse `changed` ({grid index: row}) into the frame and add the `appended` rows after it."""
+        date_col = self.header.index("Date")
+        indices = sorted(changed) + list(range(len(self.row_keys), len(self.row_keys) + len(appended)))
+        rows = [changed[i] for i in sorted(changed)] + appended
+        if rows:
+            self.frame = self._patch(self.frame, [(indices, self.parse([self.header] + rows))])
+        for i, row in zip(indices, rows):
+            if i < len(self.row_keys):
+                self.row_keys[i] = _row_key(row)
+                self.dates[i] = row[date_col]
+            else:
+                self.row_keys.append(_row_key(row))
+                self.dates.append(row[date_col])
+        self.stats["rows_parsed"] += len(rows)
+        return self.frame
+
+    def _window_rows(self, dates, today):
+        wanted = set()
+        for offset in range(-self.window_back, self.window_ahead + 1):
+            d = today + datetime.timedelta(days=offset)
+            wanted.add((d.day, d.month, d.year))
+        rows = [i for i, raw in enumerate(dates) if i > 0 and _day_key(raw) in wanted]
+        return (rows[0], rows[-1]) if rows else None
+
+    @perf.timed("delta_sync")
+    def refresh(self, today=None):
+        with self._lock:
+            if self.frame is None or self.refreshes_since_full + 1 >= self.full_every:
+                return self._full()
+            return self._delta(today or datetime.date.today())
+
+    def _delta(self, today):
+        modified = self._modified_time()
+        if modified is not None and modified == self.modified:
+            self.refreshes_since_full += 1
+            self.stats["unchanged"] += 1
+            return self.frame
+
+        width = len(self.header)
+        if "Date" not in self.frame.columns:
+            return self._full()
+        date_col = list(self.frame.columns).index("Date")
+        letter = column_letter(date_col + 1)
+        perf.count("api.batch_get")
+        with perf.timer("sheets_fetch"):
+            header_range, date_range = self.worksheet.batch_get(["1:1", f"{letter}:{letter}"])
+
+        header = header_range[0] if header_range else []
+        if len(header) > width or _pad(header, width) != self.header:
+            return self._full()
+
+        dates = [r[0] if r else "" for r in date_range]
+        old_dates = self.dates
+        grid_rows = len(old_dates)
+        last_dated = max((i for i, d in enumerate(old_dates) if d != ""), default=0)
+        if len(dates) <= last_dated:
+            return self._full()  # rows were deleted
+        window = self._window_rows(dates, today)
+        for i in range(1, min(len(dates), grid_rows)):
+            inside = window is not None and window[0] <= i <= window[1]
+            if dates[i] != old_dates[i] and not inside:
+                return self._full()
+
+        # (first grid index, last grid index) ranges to re-read; sheet rows are 1-based
+        spans = []
+        if window is not None and window[0] < grid_rows:
+            spans.append((window[0], min(window[1], grid_rows - 1)))
+        if len(dates) > grid_rows:
+            spans.append((grid_rows, len(dates) - 1))
+        if not spans:
+            self.modified = modified
+            self.refreshes_since_full += 1
+            self.stats["delta"] += 1
+            return self.frame
+
+        perf.count("api.batch_get")
+        with perf.timer("sheets_fetch"):
+            fetched = self.worksheet.batch_get([f"{a + 1}:{b + 1}" for a, b in spans])
+        changed, appended = {}, []
+        for (a, b), rows in zip(spans, fetched):
+            rows = rows + [[]] * (b - a + 1 - len(rows))
+            if any(len(r) > width for r in rows):
+                return self._full()
+            rows = [_pad(r, width) for r in rows]
+            for i, row in enumerate(rows, start=a):
+                if i >= grid_rows:
+                    appended.append(row)
+                elif _row_key(row) != self.row_keys[i]:
+                    changed[i] = row
+            self.stats["rows_fetched"] += len(rows)
+
+        self.modified = modified
+        self.refreshes_since_full += 1
+        self.stats["delta"] += 1
+        return self._splice(changed, appended)